@@ -0,0 +1,90 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from wigner_time import config as wt_config
+from wigner_time import timeline as tl
+from wigner_time.internal import dataframe as frame
+
+
+@pytest.fixture
+def df_001():
+    return frame.new(
+        [
+            [0.0, "thing", 5.0, "init"],
+            [1.0, "thing2", 7.0, "init"],
+        ],
+        columns=["time", "variable", "value", "context"],
+    )
+
+
+@pytest.fixture
+def df_002():
+    df = frame.new(
+        [
+            [2.0, "thing", 6.0, "MOT"],
+            [3.0, "thing", 8.0, "MOT"],
+        ],
+        columns=["time", "variable", "value", "context"],
+    )
+    df["function"] = np.sin
+    return df
+
+
+def test_append(df_001, df_002):
+    builder = frame.builder(df_001)
+    for _ in range(300):
+        builder = frame.concat([builder, df_002, df_001])
+
+    return frame.assert_equal(
+        frame.materialize(builder),
+        frame.concat([df_001] + [df_002, df_001] * 300),
+    )
+
+
+def test_appendInteger(df_001):
+    df = df_001.assign(module=[1, 2])
+
+    return frame.assert_equal(
+        frame.materialize(frame.concat([frame.builder(df), df_001, df])),
+        frame.concat([df, df_001, df]),
+    )
+
+
+def test_appendBranches(df_001, df_002):
+    builder = frame.builder(df_001)
+    branch1 = builder.append(df_002)
+    branch2 = builder.append(df_001)
+
+    assert len(builder) == 2
+    frame.assert_equal(branch1.frame(), frame.concat([df_001, df_002]))
+    frame.assert_equal(branch2.frame(), frame.concat([df_001, df_001]))
+
+
+def test_read(df_001, df_002):
+    builder = frame.concat([frame.builder(df_001), df_002])
+
+    assert list(builder.columns) == ["time", "variable", "value", "context", "function"]
+    assert builder["time"].max() == 3.0
+    assert (builder["variable"] == "thing").sum() == 3
+
+
+def test_stack__unbuffered():
+    args = [
+        tl.create(lockbox_MOT__MHz=0.0, shutter_MOT=0, context="ADwin_LowInit"),
+        tl.anchor(t=0.0, origin=0.0, context="InitialAnchor"),
+        tl.update(shutter_MOT=1, context="MOT"),
+        tl.ramp(lockbox_MOT__MHz=-5, duration=10e-3),
+        tl.anchor(15),
+    ]
+
+    buffered = tl.stack(*args)
+
+    wt_config.STACK__BUILDER = False
+    try:
+        unbuffered = tl.stack(*args)
+    finally:
+        wt_config.STACK__BUILDER = True
+
+    assert isinstance(buffered, frame.CLASS)
+    return frame.assert_equal(buffered, unbuffered)
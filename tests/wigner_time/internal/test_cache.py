@@ -0,0 +1,41 @@
+import numpy as np
+
+from wigner_time.internal import cache as wt_cache
+
+
+def test_LRU():
+    cache = wt_cache.LRU(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert "b" not in cache
+    assert ("a" in cache) and ("c" in cache)
+    assert cache.get("b") is None
+    info = cache.info()
+    assert (info.hits, info.misses, info.evictions, info.entries) == (1, 1, 1, 2)
+    assert info.hit_rate == 0.5
+
+
+def test_LRUBytes():
+    cache = wt_cache.LRU(max_entries=10, max_bytes=200)
+    for k in range(3):
+        cache.put(k, np.zeros(10))
+    # Too large to be cached at all
+    cache.put("large", np.zeros(100))
+
+    assert list(cache._entries) == [1, 2]
+    assert cache.info().bytes == 160
+
+
+def test_LRUGet_or_compute():
+    cache = wt_cache.LRU()
+    calls = []
+    for _ in range(3):
+        assert cache.get_or_compute("a", lambda: calls.append(1) or "value") == "value"
+
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses) == (2, 1)
+    cache.clear()
+    assert (len(cache), cache.hits, cache.misses) == (0, 0, 0)
@@ -1,4 +1,5 @@
 import pytest
+import numpy as np
 import pandas as pd
 
 # TODO: This should be abstracted
@@ -130,9 +131,79 @@ def test_replace_column__filtered():
     )
 
 
+def test_encode():
+    df = frame.encode(df_duplicate1)
+
+    assert all(frame.is_categorical(df[c]) for c in frame.COLUMNS__LABELS)
+    frame.assert_equal(frame.decode(df), df_duplicate1)
+    frame.assert_equal(
+        frame.decode(frame.replace_column__filtered(df, {"init": -1})),
+        frame.replace_column__filtered(df_duplicate1, {"init": -1}),
+    )
+
+
+def test_groups():
+    rows = frame.groups(df_duplicate1)
+
+    assert list(rows) == list(df_duplicate1["variable"].unique())
+    for variable, df in rows.items():
+        frame.assert_equal(df, df_duplicate1[df_duplicate1["variable"] == variable])
+
+
+@pytest.mark.parametrize(
+    "indices, expected",
+    [
+        ([1, 2], ["a", "x1", "x2", "b", "c", "d", "y1"]),
+        ([2, 1], ["a", "y1", "b", "c", "x1", "x2", "d"]),
+        ([0, 0], ["x1", "x2", "a", "b", "y1", "c", "d"]),
+        ([4, 4], ["a", "b", "c", "d", "x1", "x2", "y1"]),
+    ],
+)
+def test_insert_rows(indices, expected):
+    df = frame.new([["a"], ["b"], ["c"], ["d"]], columns=["variable"])
+    rows = frame.new([["x1"], ["x2"], ["y1"]], columns=["variable"])
+
+    assert frame.insert_rows(df, indices, rows, [2, 1])["variable"].tolist() == (
+        expected
+    )
+    assert frame.insert_dataframes(df, indices, [rows.iloc[:2], rows.iloc[2:]])[
+        "variable"
+    ].tolist() == (expected)
+
+
 if __name__ == "__main__":
     import importlib
 
     importlib.reload(frame)
 
     print(frame.row_from_max_column(df_simple2))
+
+
+@pytest.fixture(params=[False, True])
+def copy_on_write(request):
+    is_enabled = frame.is_copy_on_write()
+    frame.copy_on_write(request.param)
+    yield request.param
+    frame.copy_on_write(is_enabled)
+
+
+@pytest.mark.skipif(
+    int(pd.__version__.split(".")[0]) >= 3, reason="copy-on-write is always enabled"
+)
+def test_copy(copy_on_write):
+    df = df_duplicate1.copy()
+    dff = frame.copy(df)
+
+    assert np.shares_memory(df["time"].to_numpy(), dff["time"].to_numpy()) == (
+        copy_on_write
+    )
+    frame.increment_selected_rows(dff, thing=1.0)
+    frame.assert_equal(df, df_duplicate1)
+
+
+def test_copy__not_mutating(copy_on_write):
+    df = df_duplicate1.copy()
+    frame.increment_selected_rows(df, in_place=False, thing=1.0)
+    frame.replace_column__filtered(df, {"init": -1})
+
+    return frame.assert_equal(df, df_duplicate1)
@@ -0,0 +1,94 @@
+import pytest
+import numpy as np
+
+from wigner_time import config as wt_config
+from wigner_time.internal import dataframe as frame
+
+pytest.importorskip("polars")
+
+
+@pytest.fixture
+def polars():
+    frame.set_backend("polars")
+    yield
+    frame.set_backend("pandas")
+
+
+@pytest.fixture
+def df_random():
+    rng = np.random.default_rng(1)
+    num = 300
+    df = frame.new(
+        {
+            "time": rng.integers(0, 10, num) * 0.5,
+            "variable": rng.choice(["AOM_MOT", "shutter_MOT", "coil__A", None], num),
+            "value": rng.normal(size=num),
+            "context": rng.choice(["ADwin_LowInit", "MOT", "ADwin_Finish"], num),
+        },
+        columns=["time", "variable", "value", "context"],
+    )
+    df["function"] = np.sin
+    return df
+
+
+@pytest.fixture
+def df_devices():
+    return frame.new(
+        [
+            ["AOM_MOT", (0, 1), 1],
+            ["coil__A", (-3, 3), 2],
+            ["lockbox_MOT__MHz", (-200, 200), 3],
+        ],
+        columns=["variable", "unit_range", "module"],
+    )
+
+
+def _both(f):
+    result__pandas = f()
+    frame.set_backend("polars")
+    try:
+        result__polars = f()
+    finally:
+        frame.set_backend("pandas")
+    return result__pandas, result__polars
+
+
+def test_set_backend():
+    with pytest.raises(ValueError):
+        frame.set_backend("spark")
+    assert wt_config.DATAFRAME__BACKEND == "pandas"
+
+
+@pytest.mark.parametrize("keep", ["first", "last", False])
+@pytest.mark.parametrize("subset", [["time", "variable"], ["context"]])
+def test_duplicated(df_random, subset, keep):
+    return frame.assert_series_equal(
+        *_both(lambda: frame.duplicated(df_random, subset=subset, keep=keep))
+    )
+
+
+def test_drop_duplicates(df_random):
+    return frame.assert_equal(
+        *_both(lambda: frame.drop_duplicates(df_random, subset=["variable", "time"]))
+    )
+
+
+def test_join(df_random, df_devices):
+    return frame.assert_equal(*_both(lambda: frame.join(df_random, df_devices)))
+
+
+def test_replace_column__filtered(df_random):
+    return frame.assert_equal(
+        *_both(
+            lambda: frame.replace_column__filtered(
+                df_random, {"ADwin_LowInit": -2, "ADwin_Finish": 2**31 - 1}
+            )
+        )
+    )
+
+
+def test_drop_duplicatesObjects(df_random, polars):
+    # Functions can't be handed to `polars`, so `pandas` is used instead
+    assert len(frame.drop_duplicates(df_random)) == len(
+        df_random.drop_duplicates(keep="last")
+    )
@@ -0,0 +1,108 @@
+import pytest
+import numpy as np
+
+from wigner_time import anchor as wt_anchor
+from wigner_time import timeline as tl
+from wigner_time.internal import dataframe as frame
+from wigner_time.internal import origin
+
+
+@pytest.fixture
+def df_random():
+    rng = np.random.default_rng(0)
+    num = 200
+    df = frame.new(
+        {
+            "time": rng.integers(0, 20, num) * 0.5,
+            "variable": rng.choice(["AOM_MOT", "shutter_MOT", "coil__A"], num),
+            "value": rng.normal(size=num),
+            "context": rng.choice(["init", "MOT", "molasses"], num),
+        },
+        columns=["time", "variable", "value", "context"],
+    )
+    return df
+
+
+def _chunks(df, size=7):
+    builder = frame.builder(df.iloc[:size])
+    for i in range(size, len(df), size):
+        builder = frame.concat([builder, df.iloc[i : i + size]])
+    return builder
+
+
+@pytest.mark.parametrize("time__max", [None, 0.0, 3.25, 7.5, 100.0])
+@pytest.mark.parametrize(
+    "column, label",
+    [
+        ("variable", None),
+        ("variable", "AOM_MOT"),
+        ("variable", "coil__A"),
+        ("context", "MOT"),
+    ],
+)
+def test_previous(df_random, column, label, time__max):
+    builder = _chunks(df_random)
+
+    return frame.assert_series_equal(
+        origin.previous(builder, variable=label, column=column, time__max=time__max),
+        origin.previous(
+            df_random, variable=label, column=column, time__max=time__max
+        ).astype(object),
+    )
+
+
+def test_previousMissing(df_random):
+    with pytest.raises(ValueError):
+        origin.previous(_chunks(df_random), variable="AOM_repump")
+
+
+def test_summary(df_random):
+    df = df_random[df_random["variable"] == "AOM_MOT"]
+    summary = _chunks(df_random).summary("AOM_MOT")
+
+    assert summary.time__last == df["time"].max()
+    assert summary.value__last == origin.previous(df_random, "AOM_MOT")["value"]
+    assert summary.value__min == df["value"].min()
+    assert summary.value__max == df["value"].max()
+
+
+def test_branches(df_random):
+    builder = frame.builder(df_random.iloc[:10])
+    row = builder.latest()
+    frame.concat([builder, df_random.iloc[10:].assign(time=1e3)])
+
+    assert builder.latest().name == row.name
+    assert (
+        builder.contains("AOM_MOT")
+        == (df_random.iloc[:10]["variable"] == "AOM_MOT").any()
+    )
+
+
+@pytest.fixture
+def timeline_anchors():
+    return tl.stack(
+        tl.create(lockbox_MOT__MHz=0.0, shutter_MOT=0, context="ADwin_LowInit"),
+        tl.anchor(t=0.0, origin=0.0, context="InitialAnchor"),
+        tl.update(shutter_MOT=1, context="MOT"),
+        tl.anchor(t=1.0, context="MOT"),
+        tl.ramp(lockbox_MOT__MHz=-5, duration=10e-3),
+        tl.anchor(t=2.0, context="molasses"),
+    )
+
+
+def test_anchors(timeline_anchors):
+    builder = frame.builder(timeline_anchors)
+    table = builder.anchors()
+
+    assert wt_anchor.count(builder) == wt_anchor.count(timeline_anchors) == 3
+    assert list(table["ordinal"]) == [1, 2, 3]
+    assert list(table["variable"]) == list(
+        timeline_anchors.loc[table.index, "variable"]
+    )
+    for context in [None, "MOT", "molasses", "ADwin_LowInit"]:
+        assert wt_anchor.last(builder, context) == wt_anchor.last(
+            timeline_anchors, context
+        )
+        assert wt_anchor.is_available(builder, context) == wt_anchor.is_available(
+            timeline_anchors, context
+        )
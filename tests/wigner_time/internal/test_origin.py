@@ -130,3 +130,40 @@ def test_originAuto2(df_context1):
 def test_originAuto3(df_context1):
     defaults = [["anchor", None], ["last", None]]
     assert origin.auto(df_context1, None, origin__defaults=defaults) == ["anchor", None]
+
+
+@pytest.mark.parametrize(
+    "orig",
+    [
+        ["variable", "variable"],
+        ["variable", None],
+        ["anchor", "variable"],
+        [0.5, "variable"],
+        ["anchor", None],
+        "last",
+    ],
+)
+@pytest.mark.parametrize("timeline", [lambda df: df, frame.builder])
+def test_find_every(df_001, orig, timeline):
+    variables = ["thing", "thing2", "thing3"]
+    tvs = origin.find_every(
+        timeline(df_001), variables, origin=orig, time__max__relative=10.0
+    )
+
+    for var in variables:
+        assert list(tvs[var]) == list(
+            origin.find(
+                df_001,
+                origin=(
+                    [var if e == "variable" else e for e in orig]
+                    if isinstance(orig, list)
+                    else orig
+                ),
+                time__max__relative=10.0,
+            )
+        )
+
+
+def test_find_everyMissing(df_001):
+    with pytest.raises(ValueError):
+        origin.find_every(df_001, ["thing", "AOM_MOT"], origin=["variable", None])
@@ -0,0 +1,87 @@
+import pytest
+
+from wigner_time import timeline as tl
+from wigner_time.internal import dataframe as frame
+
+
+@pytest.fixture
+def timeline_init():
+    return tl.create(
+        AOM_MOT=[[0.0, 0.0]],
+        shutter_MOT=[[0.0, 0.0]],
+        lockbox_MOT__MHz=[[0.0, 0.0]],
+        context="ADwin_LowInit",
+    )
+
+
+def _names(df):
+    df = df.copy()
+    if "function" in df.columns:
+        df["function"] = df["function"].map(lambda f: getattr(f, "__name__", f))
+    return df
+
+
+@pytest.mark.parametrize(
+    "ops",
+    [
+        # Fused `update`s, with contexts inherited across the batch
+        [
+            tl.update(AOM_MOT=1, t=1e-3),
+            tl.update(AOM_MOT=[[2e-3, 0, "MOT"]]),
+            tl.update(shutter_MOT=1, t=1e-3),
+            tl.update(shutter_MOT=0, t=-1e-3),
+        ],
+        # The 'last' origin depends on the previous `update`
+        [
+            tl.update(AOM_MOT=1, t=1e-3),
+            tl.update(shutter_MOT=1, t=1e-3),
+            tl.ramp(lockbox_MOT__MHz=-5, duration=1e-3),
+        ],
+        # Deferred `expand`
+        [
+            tl.anchor(0.0, origin=0.0, context="MOT"),
+            tl.update(AOM_MOT=1, t=1e-3, context="MOT"),
+            tl.update(shutter_MOT=1, t=1e-3, context="MOT"),
+            tl.ramp(lockbox_MOT__MHz=-5, duration=1e-3),
+            tl.expand,
+            tl.update(AOM_MOT=0, t=2e-3, context="molasses"),
+            tl.anchor(3e-3, context="molasses"),
+        ],
+        # An `update` that adds an anchor isn't fused with the `update`s after it
+        [
+            tl.anchor(0.1, origin=0.0),
+            tl.update(t=0.2, **{"⚓_009": 0.0}),
+            tl.update(AOM_MOT=1, t=1.0),
+        ],
+    ],
+)
+def test_collect(timeline_init, ops):
+    return frame.assert_equal(
+        _names(tl.stack(timeline_init, *ops, lazy=True).collect()),
+        _names(tl.stack(timeline_init, *ops)),
+    )
+
+
+def test_functional(timeline_init):
+    ops = [tl.update(AOM_MOT=1, t=1e-3), tl.update(shutter_MOT=1, t=2e-3)]
+    plan = tl.stack(*ops, lazy=True, context="MOT")
+
+    return frame.assert_equal(
+        plan(timeline_init), tl.stack(*ops, context="MOT")(timeline_init)
+    )
+
+
+def test_explain(timeline_init):
+    plan = tl.stack(
+        timeline_init,
+        tl.update(AOM_MOT=1, t=1e-3),
+        tl.update(shutter_MOT=1, t=2e-3),
+        tl.ramp(lockbox_MOT__MHz=-5, duration=1e-3),
+        tl.expand,
+        lazy=True,
+    )
+    lines = plan.explain().splitlines()
+
+    assert lines[0] == "Plan: 4 operations in 3 steps"
+    assert "[fused] (AOM_MOT, shutter_MOT)" in lines[1]
+    assert "expand" in lines[3]
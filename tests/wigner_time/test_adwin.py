@@ -1,6 +1,7 @@
 import pathlib as pl
 import sys
 import pytest
+import numpy as np
 import pandas as pd
 
 from wigner_time.adwin import core as adwin
@@ -123,6 +124,18 @@ def test_add_cycle():
     )
 
 
+def test_add_cycleKnown():
+    df = pd.DataFrame(
+        {
+            "time": [0.0, 1e-3, 2e-3, 3e-3],
+            "context": ["MOT", "MOT", "MOT", "ADwin_Finish"],
+            "cycle": [0, 201, None, 7],
+        }
+    )
+
+    assert adwin.add_cycle(df)["cycle"].tolist() == [0, 201, 400, 2**31 - 1]
+
+
 ###############################################################################
 #                        dealing with special contexts                        #
 ###############################################################################
@@ -218,6 +231,89 @@ def test_sanitize_success():
     )
 
 
+def test_sanitizeEncoded():
+    return pd.testing.assert_frame_equal(
+        frame.decode(adwin.sanitize(frame.encode(df_special3))),
+        df_special3__corrected,
+    )
+
+
+def test_digitizers():
+    connections = con.connection(
+        ["AOM_imaging", 1, 1],
+        ["AOM_imaging__V", 2, 2],
+        ["AOM_repump", 2, 3],
+    )
+    devices = pd.DataFrame(
+        columns=["variable", "unit_range", "safety_range"],
+        data=[["AOM_imaging__V", (-10, 10), (-10, 10)]],
+    )
+    digitizers = adwin.digitizers(connections, devices)
+
+    assert digitizers["AOM_imaging"](np.array([0.4, 0.6])).tolist() == [0.0, 1.0]
+    assert digitizers["AOM_imaging__V"](np.array([0.0, 10.0])).tolist() == [
+        2**15,
+        2**16,
+    ]
+    assert "AOM_repump" not in digitizers
+
+
+def test_tolerances():
+    connections = con.connection(
+        ["AOM_imaging__V", 1, 1],
+        ["AOM_repump__V", 2, 2],
+        ["AOM_MOT__V", 2, 3],
+    )
+    devices = pd.DataFrame(
+        columns=["variable", "unit_range", "safety_range"],
+        data=[
+            ["AOM_imaging__V", (-10, 10), (-10, 10)],
+            ["AOM_repump__V", (-10, 10), (-10, 10)],
+        ],
+    )
+
+    assert adwin.tolerances(connections, devices, digits=2) == {
+        "AOM_repump__V": 40 / 2**16
+    }
+
+
+def test_resolutions():
+    connections = con.connection(
+        ["AOM_imaging", 1, 1],
+        ["AOM_imaging__V", 2, 2],
+        ["coil__A", 2, 3],
+        ["lockbox__MHz", 3, 4],
+    )
+    devices = pd.DataFrame(
+        columns=["variable", "unit_range", "safety_range"],
+        data=[
+            ["AOM_imaging__V", (-10, 10), (-10, 10)],
+            ["lockbox__MHz", (-200, 200), (-200, 200)],
+        ],
+    )
+    table = adwin.resolutions(connections, devices)
+
+    assert table["unit"].tolist() == [None, "__V", "__A", "__MHz"]
+    assert table["is_digital"].tolist() == [True, False, False, False]
+    np.testing.assert_array_equal(
+        table["digits_per_unit"], [np.nan, 2**16 / 20, np.nan, 2**16 / 400]
+    )
+
+
+def test_check_safety_range():
+    tline = pd.DataFrame(
+        {
+            "variable": ["AOM_imaging__V", "AOM_imaging__V", "AOM_repump"],
+            "value": [1.0, 4.0, 100.0],
+            "safety_range": [(-3, 3), (-3, 3), None],
+        }
+    )
+
+    with pytest.raises(ValueError, match="AOM_imaging__V was given a value of 4.0"):
+        adwin.check_safety_range(tline)
+    adwin.check_safety_range(tline.iloc[[0, 2]])
+
+
 def test_to_adbasic():
     connections = con.connection(
         ["shutter_MOT", 1, 11],
@@ -293,3 +389,19 @@ def test_to_adbasic():
 
     # assert False
     assert tuples == tuples__guess
+
+
+def test_outputColumnar():
+    tline = pd.DataFrame(
+        {
+            "cycle": [-2, 0, 10, 20],
+            "module": [1, 3, 1, 3],
+            "channel": [11, 8, 11, 8],
+            "value_digits": [0, 32768, 1, 32358],
+        }
+    )
+    analogue, digital = adwin.output(tline, is_columnar=True)
+
+    assert analogue.dtype == digital.dtype == np.int32
+    assert analogue.tolist() == [[0, 20], [3, 3], [8, 8], [32768, 32358]]
+    assert [list(zip(*a)) for a in (analogue, digital)] == adwin.output(tline)
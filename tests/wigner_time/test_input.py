@@ -1,4 +1,5 @@
 import pytest
+import numpy as np
 import pandas as pd
 
 from wigner_time import timeline as tl
@@ -82,3 +83,33 @@ def test_convertMulti(input):
         ["AOM_imaging__A", [[2.0, 0.0, "init"], [3.0, 0.0, "init"]]],
     ]
     assert input == expected
+
+
+@pytest.mark.parametrize(
+    "vtvc_dict",
+    [
+        {"AOM_MOT": np.array([[0.0, 1.0], [1e-6, 0.5], [2e-6, 0.0]])},
+        {
+            "AOM_MOT": np.array([[0, 1], [1, 0]]),
+            "shutter_MOT": [[0.0, 1.0, "MOT"], [2.0, 0.0, "MOT"]],
+            "lockbox_MOT__MHz": 5.0,
+        },
+    ],
+)
+@pytest.mark.parametrize("context", [None, "init"])
+def test_columns_from_arguments(vtvc_dict, context):
+    columns = input.columns_from_arguments(time=0.0, context=context, **vtvc_dict)
+    rows = input.rows_from_arguments(time=0.0, context=context, **vtvc_dict)
+
+    assert input.columns_from_arguments({"AOM_MOT": 1.0}) is None
+    for i, k in enumerate(["time", "variable", "value", "context"]):
+        assert list(columns[k]) == [row[i] for row in rows]
+
+
+def test_createArray():
+    values = np.column_stack([np.arange(1000) * 1e-6, np.linspace(0, 1, 1000)])
+
+    return pd.testing.assert_frame_equal(
+        tl.create({"AOM_MOT": values}, context="init"),
+        tl.create(AOM_MOT=values.tolist(), context="init"),
+    )
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from wigner_time.adwin import core as adwin
+from wigner_time.adwin import mock
+
+
+def test_pars():
+    machine = mock.ADwin()
+    machine.Set_Par(1, 601)
+
+    assert machine.Get_Par(1) == 601
+    assert machine.Get_Par(2) == 0
+    with pytest.raises(ValueError):
+        machine.Set_Par(mock.NUM__PARS + 1, 1)
+
+
+def test_data():
+    machine = mock.ADwin(dimensions={10: 6})
+    machine.SetData_Long(np.array([1, 2, 3, 4]), 10, 3, 3)
+
+    assert machine.data[10].tolist() == [0, 0, 1, 2, 3]
+    assert machine.GetData_Long(10, 2, 5).tolist() == [0, 1, 2, 3, 0]
+    assert machine.Data_Length(10) == 6
+    assert machine.statistics.bytes__sent == 3 * 4
+    assert machine.statistics.bytes__received == 5 * 4
+    with pytest.raises(ValueError):
+        machine.SetData_Long([1, 2], 10, 6, 2)
+    with pytest.raises(ValueError):
+        machine.SetData_Long([1, 2], 10, 1, 3)
+
+    # Undeclared arrays
+    machine.SetData_Long([7], 21, 1, 1)
+    assert machine.GetData_Long(21, 1, 1).tolist() == [7]
+    with pytest.raises(ValueError):
+        mock.ADwin(dimensions={10: 6}, is_strict=True).SetData_Long([7], 21, 1, 1)
+
+
+def test_processes():
+    machine = mock.ADwin()
+    machine.Load_Process("WignerTimeADwin.TC1")
+    machine.Start_Process(1)
+
+    assert machine.Process_Status(1) == 1
+    machine.Stop_Process(1)
+    assert machine.Process_Status(1) == 0
+
+
+def test_timing():
+    machine = mock.ADwin(latency=1e-3, bandwidth=4e5)
+    machine.SetData_Long(np.zeros(100), 10, 1, 100)
+    machine.Set_Par(1, 1)
+
+    assert machine.statistics.calls == 2
+    assert machine.statistics.seconds == pytest.approx(2e-3 + 400 / 4e5)
+
+
+def test_initialize_ADwin():
+    output = [
+        [(-2, 3, 8, 32768), (600, 3, 8, 32768)],
+        [(-2, 1, 11, 0), (0, 1, 11, 1)],
+    ]
+    machine = adwin.initialize_ADwin(mock.ADwin(), output)
+
+    assert machine.Get_Par(1) == 600
+    assert machine.GetData_Long(13, 1, 2).tolist() == [32768, 32768]
+    assert machine.GetData_Long(22, 1, 2).tolist() == [11, 11]
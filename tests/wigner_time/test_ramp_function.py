@@ -0,0 +1,104 @@
+import functools
+
+import numpy as np
+import pytest
+
+from wigner_time import ramp_function as rf
+
+t1 = np.array([0.0, 1.0, -0.5, 2.0, 3.0])
+v1 = np.array([0.0, 5.0, -1.0, 2.0, 1.0])
+t2 = np.array([1e-4, 1.0 + 3.3e-5, -0.5 + 7e-6, 2.0, 3.0 - 1e-5])
+v2 = np.array([1.0, -5.0, 3.0, 2.0, 4.0])
+
+
+def _pairs(f, **kws):
+    tvs = [
+        f(np.array([a, b]), np.array([c, d]), **kws)
+        for a, b, c, d in zip(t1, v1, t2, v2)
+    ]
+    return (
+        np.concatenate([tv[:, 0] for tv in tvs]),
+        np.concatenate([tv[:, 1] for tv in tvs]),
+        np.cumsum([0] + [len(tv) for tv in tvs]),
+    )
+
+
+@pytest.mark.parametrize("f", [rf.linear, rf.tanh])
+@pytest.mark.parametrize("time_resolution", [1e-6, 2.5e-6])
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_batched(f, time_resolution):
+    for expected, result in zip(
+        _pairs(f, time_resolution=time_resolution),
+        rf.batched(f)(t1, v1, t2, v2, time_resolution=time_resolution),
+    ):
+        np.testing.assert_array_equal(result, expected)
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_batchedPartial():
+    f = functools.partial(rf.tanh, ti=2)
+
+    assert rf.batched(f).func is rf.tanh__batched
+    for expected, result in zip(_pairs(f), rf.batched(f)(t1, v1, t2, v2)):
+        np.testing.assert_array_equal(result, expected)
+
+
+def test_batchedAdapter():
+    def f(origin, terminus, num=3):
+        return np.linspace(origin, terminus, num=num)
+
+    times, values, offsets = rf.batched(f)(t1, v1, t2, v2, num=4)
+
+    np.testing.assert_array_equal(offsets, [0, 4, 8, 12, 16, 20])
+    np.testing.assert_array_equal(times[offsets[:-1]], t1)
+    np.testing.assert_array_equal(values[offsets[1:] - 1], v2)
+
+
+def test_shape__tanh():
+    rf.SHAPES.clear()
+    shape = rf.shape__tanh(11, ti=3)
+
+    assert rf.shape__tanh(11, ti=3) is shape
+    assert rf.SHAPES.info().hits == 1
+    assert not shape.flags.writeable
+    np.testing.assert_allclose(shape[[0, 5, -1]], [-0.5, 0.0, 0.5])
+    np.testing.assert_allclose(
+        rf.tanh([0.0, 1.0], [1.0, 3.0], time_resolution=0.1)[:, 1], 2.0 + 2.0 * shape
+    )
+
+
+@pytest.mark.parametrize("tolerance", [1e-3, 1e-2, 0.1])
+def test_knots(tolerance):
+    times, values, offsets = rf.tanh__batched(t1, v1, t1 + 1e-3, v2)
+    is_knot = rf.knots(times, values, offsets, tolerance)
+
+    for start, stop in zip(offsets[:-1], offsets[1:]):
+        t, v, k = times[start:stop], values[start:stop], is_knot[start:stop]
+        assert k[0] and k[-1]
+        assert np.abs(np.interp(t, t[k], v[k]) - v).max() <= tolerance
+    assert is_knot.sum() < len(times) / 10
+
+
+@pytest.mark.parametrize("tolerance", [1e-3, 1e-2, 0.1])
+def test_knots__held(tolerance):
+    times, values, offsets = rf.tanh__batched(t1, v1, t1 + 1e-3, v2)
+    is_knot = rf.knots__held(times, values, offsets, tolerance)
+
+    for start, stop in zip(offsets[:-1], offsets[1:]):
+        v, k = values[start:stop], is_knot[start:stop]
+        assert k[0] and k[-1]
+        # The value held from the last knot
+        held = v[k][np.cumsum(k) - 1]
+        assert np.abs(held - v).max() <= tolerance
+    assert is_knot.sum() < len(times)
+    assert rf.knots__held(times, values, offsets, np.nan).all()
+
+
+def test_knotsLinear():
+    times, values, offsets = rf.linear__batched(t1, v1, t1 + 1e-4, v2)
+
+    np.testing.assert_array_equal(
+        np.flatnonzero(rf.knots(times, values, offsets, [1e-9] * 4 + [np.inf])),
+        np.sort(np.concatenate([offsets[:-1], offsets[1:] - 1])),
+    )
+    assert rf.knots(times, values, offsets, np.nan).all()
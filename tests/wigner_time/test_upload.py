@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from wigner_time.adwin import core as adwin
+from wigner_time.adwin import mock
+from wigner_time.adwin import upload
+
+
+@pytest.fixture
+def output():
+    return [
+        [(-2, 3, 8, 32768), (600, 3, 8, 32768), (601, 3, 8, 32358)],
+        [(-2, 1, 11, 0), (0, 1, 11, 1)],
+    ]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 10])
+def test_send(chunk_size):
+    machine = mock.ADwin()
+    values = np.arange(5, dtype=np.int64)
+    statistics = upload.send(machine, values, 10, chunk_size=chunk_size, start=3)
+
+    assert machine.data[10].tolist() == [0, 0, 0, 0, 1, 2, 3, 4]
+    assert statistics.bytes == machine.statistics.bytes__sent == 5 * 4
+    assert statistics.calls == machine.statistics.calls == -(-5 // chunk_size)
+
+
+def test_initialize_ADwin(output):
+    machine = adwin.initialize_ADwin(mock.ADwin(), output, chunk_size=2)
+    columns = [np.array(o).T for o in output]
+    statistics = machine.statistics.copy()
+
+    assert [machine.Get_Par(i) for i in [1, 2, 3]] == [601, 3, 2]
+    for stream, numbers in zip(columns, upload.DATA_NUMBERS):
+        for values, number in zip(stream, numbers):
+            assert machine.data[number].tolist() == values.tolist()
+
+    machine__columnar = adwin.initialize_ADwin(
+        mock.ADwin(), [upload.to_columns(o) for o in output], chunk_size=2
+    )
+    assert machine__columnar.statistics == statistics
+    for number in machine.data:
+        assert machine__columnar.data[number].tolist() == machine.data[number].tolist()
+
+
+def test_changes():
+    hashes = upload.hashes(np.arange(10), block_size=2)
+    hashes__changed = upload.hashes([0, 1, 9, 3, 9, 5, 6, 7, 8, 9, 10], block_size=2)
+
+    assert len(hashes) == 5
+    assert upload.changes(hashes, [], 10, block_size=2) == [(0, 10)]
+    assert upload.changes(hashes, hashes, 10, block_size=2) == []
+    assert upload.changes(hashes__changed, hashes, 11, block_size=2) == [
+        (2, 6),
+        (10, 11),
+    ]
+
+
+def test_Uploader(output):
+    machine = mock.ADwin()
+    uploader = upload.Uploader(block_size=2, chunk_size=1)
+    adwin.initialize_ADwin(machine, output, uploader=uploader)
+    data = {number: array.copy() for number, array in machine.data.items()}
+    calls = machine.statistics.calls
+
+    # Nothing has changed
+    adwin.initialize_ADwin(machine, output, uploader=uploader)
+    assert machine.statistics.calls == calls
+
+    # A single event changes
+    output__changed = [list(output[0]), list(output[1])]
+    output__changed[0][2] = (601, 3, 8, 32000)
+    statistics = uploader.send(machine, output__changed, pars={1: 601, 2: 3, 3: 2})
+    assert statistics.pars == []
+    assert statistics.arrays[13].calls == 1
+    assert statistics.arrays[10].calls == 0
+    assert machine.data[13].tolist() == [32768, 32768, 32000]
+
+    # An event is added, which changes Par_2 along with the last block
+    output__changed[0].append((602, 3, 8, 1))
+    statistics = uploader.send(machine, output__changed, pars={1: 602, 2: 4, 3: 2})
+    assert statistics.pars == [1, 2]
+    assert statistics.calls == 4 * 2
+    assert machine.data[10].tolist() == [-2, 600, 601, 602]
+    assert machine.data[20].tolist() == data[20].tolist()
+
+    uploader.reset()
+    statistics = uploader.send(machine, output__changed)
+    assert statistics.calls == 4 * 4 + 4 * 2
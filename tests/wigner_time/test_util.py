@@ -1,3 +1,6 @@
+import pickle
+
+import numpy as np
 import pytest
 
 from wigner_time import timeline as tl
@@ -28,3 +31,28 @@ def test_function__deferred():
             ["time", "variable", "value"]
         ],
     )
+
+
+def test_operation():
+    op = tl.ramp(AOM_MOT=1, duration=1e-3, context="MOT")
+
+    assert isinstance(op, wt_util.Operation)
+    assert op.func is tl.ramp
+    assert op.kwargs["AOM_MOT"] == 1
+    assert op == tl.ramp(AOM_MOT=1, duration=1e-3, context="MOT")
+    assert op != tl.ramp(AOM_MOT=2, duration=1e-3, context="MOT")
+    assert len({op, tl.ramp(AOM_MOT=1, duration=1e-3, context="MOT")}) == 1
+
+
+def test_operationPickle():
+    op = tl.update(AOM_MOT=[[0.0, 1.0]], shutter_MOT=0, t=1e-3)
+    op__copy = pickle.loads(pickle.dumps(op))
+    timeline = tl.create(AOM_MOT=0.0, shutter_MOT=1, context="init")
+
+    assert op__copy == op
+    assert hash(op__copy) == hash(op)
+    return wt_frame.assert_equal(op__copy(timeline), op(timeline))
+
+
+def test_ranges():
+    np.testing.assert_array_equal(wt_util.ranges([5, 0, 2], [2, 0, 3]), [5, 6, 2, 3, 4])
@@ -321,6 +321,32 @@ def test_createOriginVariableVariable(input):
     )
 
 
+def test_updateOriginPerVariable():
+    """
+    The origin of a variable doesn't depend on the other variables of the same update.
+    """
+    timeline = tl.stack(
+        tl.create(lockbox__V=0.0, AOM_MOT=0.0, context="init"),
+        tl.anchor(3e-3),
+        tl.update(t=5e-3, lockbox__V=1.0),
+    )
+    kws = [
+        dict(lockbox__V=1.0),
+        dict(lockbox__V=1.0, AOM_MOT=[[1.9e-3, 2.0]]),
+        dict(AOM_MOT=[[1.9e-3, 2.0]], lockbox__V=1.0),
+    ]
+    for kw in kws:
+        new = tl.update(timeline, t=5e-3, origin=["anchor", "variable"], **kw)
+        lockbox = new[new["variable"] == "lockbox__V"].iloc[-1]
+        assert lockbox["time"] == pytest.approx(8e-3)
+        assert lockbox["value"] == 2.0
+
+    new = tl.update(timeline, t=5e-3, origin=["anchor", "variable"], **kws[1])
+    AOM = new[new["variable"] == "AOM_MOT"].iloc[-1]
+    assert AOM["time"] == pytest.approx(4.9e-3)
+    assert AOM["value"] == 2.0
+
+
 if __name__ == "__main__":
     import importlib as lib
 
@@ -1,6 +1,11 @@
+import concurrent.futures
+
+import numpy as np
 import pytest
 
+from wigner_time import ramp_function as rf
 from wigner_time import timeline as tl
+from wigner_time.internal import cache as wt_cache
 from wigner_time.internal import dataframe as frame
 
 
@@ -69,6 +74,121 @@ def test_stack__kws(dfseq):
     )
 
 
+def test_expand__not_mutating():
+    tline = tl.stack(
+        tl.create("lockbox_MOT__V", [[0.0, 0.0], [5.0, 0.0]]),
+        tl.ramp(t=5.0, lockbox_MOT__V=[0.8, 1.0]),
+    )
+    tline__copy = tline.copy()
+    tl.expand(tline, time_resolution=0.2)
+
+    return frame.assert_equal(tline, tline__copy)
+
+
+def test_expandMultiple(dfseq):
+    tst = tl.expand(
+        tl.stack(
+            tl.create("lockbox_MOT__V", [[0.0, 0.0], [5.0, 0.0]]),
+            tl.ramp(t=5.0, lockbox_MOT__V=[0.8, 1.0]),
+            tl.ramp(t=5.0, shutter__V=[0.8, 1.0], context="other"),
+        ),
+        time_resolution=0.2,
+    )
+
+    frame.assert_equal(tst[tst["variable"] == "lockbox_MOT__V"], dfseq)
+    return frame.assert_equal(
+        tst[tst["variable"] == "shutter__V"].reset_index(drop=True),
+        dfseq.iloc[2:]
+        .reset_index(drop=True)
+        .assign(variable="shutter__V", context="other"),
+    )
+
+
+def test_expandCycles(dfseq):
+    tst = tl.expand(
+        tl.stack(
+            tl.create("lockbox_MOT__V", [[0.0, 0.0], [5.0, 0.0]]),
+            tl.ramp(t=5.0, lockbox_MOT__V=[0.8, 1.0]),
+        ),
+        cycle_period=0.2,
+    )
+
+    assert tst["cycle"].tolist() == [0, 25, 25, 26, 27, 28, 29]
+    return frame.assert_equal(tst.drop(columns="cycle"), dfseq)
+
+
+def test_expandDigitized():
+    tline = tl.stack(
+        tl.create("lockbox_MOT__V", [[0.0, 0.0], [5.0, 0.0]]),
+        tl.ramp(t=5.0, lockbox_MOT__V=[0.8, 1.0]),
+    )
+    tst = tl.expand(tline, time_resolution=0.2, digitizers={"lockbox_MOT__V": np.round})
+
+    # The tanh ramp (0.0, 0.045, 0.5, 0.955, 1.0) only changes the rounded output once
+    assert tst["time"].tolist() == [0.0, 5.0, 5.0, 5.6]
+    frame.assert_equal(
+        tl.expand(tline, time_resolution=0.2, digitizers={"other": np.round}),
+        tl.expand(tline, time_resolution=0.2),
+    )
+
+
+def test_expandTolerance(dfseq):
+    tline = tl.stack(
+        tl.create("lockbox_MOT__V", [[0.0, 0.0], [5.0, 0.0]]),
+        tl.ramp(t=5.0, lockbox_MOT__V=[0.8, 1.0]),
+    )
+
+    assert tl.expand(tline, time_resolution=0.2, tolerance=0.1)["time"].tolist() == [
+        0.0,
+        5.0,
+        5.0,
+        5.2,
+        5.6,
+        5.8,
+    ]
+    return frame.assert_equal(
+        tl.expand(tline, time_resolution=0.2, tolerance={"other": 0.1}), dfseq
+    )
+
+
+@pytest.mark.parametrize("workers", [1, 3, "executor"])
+def test_expandWorkers(workers):
+    tline = tl.stack(
+        tl.create("lockbox_MOT__V", [[0.0, 0.0], [5.0, 0.0]]),
+        *[
+            tl.ramp(t=5.0 + i, duration=0.5 + 0.1 * i, lockbox_MOT__V=i % 2)
+            for i in range(5)
+        ],
+        tl.ramp(t=5.0, shutter__V=[0.8, 1.0], context="other", function=rf.linear),
+    )
+    expected = tl.expand(tline, time_resolution=0.05)
+
+    if workers == "executor":
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            tst = tl.expand(tline, time_resolution=0.05, workers=executor)
+    else:
+        tst = tl.expand(tline, time_resolution=0.05, workers=workers)
+    return frame.assert_equal(tst, expected)
+
+
+def test_expandCache():
+    def tline(v):
+        return tl.stack(
+            tl.create("lockbox_MOT__V", [[0.0, 0.0], [5.0, 0.0]]),
+            tl.ramp(t=5.0, lockbox_MOT__V=[0.8, 1.0]),
+            tl.ramp(t=5.0, shutter__V=[0.8, v], context="other"),
+        )
+
+    cache = wt_cache.LRU()
+    for v in [1.0, 1.0, 2.0]:
+        frame.assert_equal(
+            tl.expand(tline(v), time_resolution=0.2, cache=cache),
+            tl.expand(tline(v), time_resolution=0.2),
+        )
+    # The two ramps of the first timeline are the same (apart from the variable)
+    assert (cache.info().hits, cache.info().misses, len(cache)) == (3, 3, 2)
+
+
 # def test_waitVariable(df_wait):
 #     return frame.assert_equal(
 #         tl.wait(variables=["AOM_imaging"], timeline=df_wait, context="test"),
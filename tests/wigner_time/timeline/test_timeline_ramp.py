@@ -383,3 +383,118 @@ def test_rampDoesNotRaise3(tl_anchor):
     return wt_frame.assert_equal(
         tl.stack(tl_anchor, tl.ramp(lockbox_MOT__V=0.0, duration=1.0)), tl_anchor
     )
+
+
+def test_ramps(tl_anchor):
+    tl_anchor = tl.stack(tl_anchor, tl.update(AOM_MOT__V=0.0))
+    tst = tl.stack(
+        tl_anchor,
+        tl.ramps(
+            segments=dict(
+                variable=["lockbox_MOT__V", "AOM_MOT__V", "lockbox_MOT__V"],
+                time__end=[100e-3, 50e-3, 20e-3],
+                value__end=[5.0, 1.0, 0.0],
+                context=["MOT", None, None],
+            ),
+            context="init",
+        ),
+    )
+    expected = tl.stack(
+        tl_anchor,
+        tl.ramp(lockbox_MOT__V=[100e-3, 5.0], context="MOT"),
+        tl.ramp(AOM_MOT__V=[50e-3, 1.0], context="init"),
+    )
+    # The last segment doesn't change the value and so is dropped
+    return wt_frame.assert_equal(
+        tst.sort_values(["variable", "time"], kind="stable").reset_index(drop=True),
+        expected.sort_values(["variable", "time"], kind="stable").reset_index(
+            drop=True
+        ),
+    )
+
+
+def test_rampsLadder(tl_anchor):
+    num = 4
+    ladder = tl.stack(
+        tl_anchor,
+        tl.ramps(
+            segments=dict(
+                variable="lockbox_MOT__V",
+                time__start=np.arange(num, dtype=float),
+                value__start=np.arange(num, dtype=float),
+                time__end=0.5,
+                value__end=np.arange(1, num + 1, dtype=float),
+                function=ramp_function.linear,
+            ),
+            origin=[0.0, None],
+        ),
+    )
+    expected = tl.stack(
+        tl_anchor,
+        *[
+            tl.ramp(
+                lockbox_MOT__V=[[float(k), float(k)], [0.5, float(k + 1)]],
+                origin=[0.0, None],
+                function=ramp_function.linear,
+            )
+            for k in range(num)
+        ],
+    )
+    return wt_frame.assert_equal(
+        tl.expand(ladder, time_resolution=0.1),
+        tl.expand(expected, time_resolution=0.1),
+    )
+
+
+def test_rampsMissingColumns(tl_anchor):
+    with pytest.raises(ValueError):
+        tl.ramps(segments=dict(variable=["lockbox_MOT__V"]), timeline=tl_anchor)
+
+
+@pytest.mark.parametrize("function", [ramp_function.tanh, ramp_function.linear])
+def test_rampKnots(tl_anchor, function):
+    tst = tl.expand(
+        tl.stack(
+            tl_anchor,
+            tl.ramp(
+                lockbox_MOT__V=[[1.0, 0.0], [1.0, 1.0], [2.0, 3.0], [2.5, 0.0]],
+                origin=[0.0, None],
+                function=function,
+            ),
+        ),
+        time_resolution=0.25,
+    )
+    expected = tl.expand(
+        tl.stack(
+            tl_anchor,
+            tl.ramp(
+                lockbox_MOT__V=[[1.0, 0.0], [1.0, 1.0]],
+                origin=[0.0, None],
+                function=function,
+            ),
+            tl.ramp(
+                lockbox_MOT__V=[[2.0, 1.0], [1.0, 3.0]],
+                origin=[0.0, None],
+                function=function,
+            ),
+            tl.ramp(
+                lockbox_MOT__V=[[3.0, 3.0], [0.5, 0.0]],
+                origin=[0.0, None],
+                function=function,
+            ),
+        ),
+        time_resolution=0.25,
+    )
+    # Where the pieces meet, the sample of the later piece is kept
+    return wt_frame.assert_equal(
+        tst,
+        expected[~expected.duplicated(["time", "variable"], keep="last")].reset_index(
+            drop=True
+        ),
+    )
+
+
+def test_expandKnotsRaises(tl_anchor):
+    tline = tl.stack(tl_anchor, tl.ramp(lockbox_MOT__V=[100e-3, 5.0]))
+    with pytest.raises(ValueError):
+        tl.expand(tline, num__bounds=3)
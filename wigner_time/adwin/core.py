@@ -1,12 +1,15 @@
 # Copyright Thomas W. Clark & András Vukics 2024. Distributed under the Boost Software License, Version 1.0. (See accompanying file LICENSE.txt)
 
-from copy import deepcopy
+import functools
 
 import funcy
 import numpy as np
 
 from wigner_time import timeline as tl
 from wigner_time import conversion as conv
+from wigner_time import util as wt_util
+from wigner_time import config as wt_config
+from wigner_time.adwin import upload as adwin_upload
 from wigner_time.internal import dataframe as wt_frame
 
 
@@ -45,6 +48,9 @@ SPECIFICATIONS__DEFAULT = {
 CONTEXTS__SPECIAL = {"ADwin_LowInit": -2, "ADwin_Init": -1, "ADwin_Finish": 2**31 - 1}
 """Used for passing information to the ADwin controller"""
 
+UNITS__ANALOGUE = ["__A", "__V", "__MHz"]
+"""Variables whose names contain one of these units are converted linearly, according to their `unit_range` (see `resolutions`)."""
+
 
 SCHEMA = {
     "time": float,
@@ -66,17 +72,10 @@ def remove_unconnected_variables(timeline, connections):
     """
     # TODO: Shouldn't be here!!! More general
 
-    timeline = deepcopy(timeline)
-    _disconnections = [
-        v
-        for v in timeline["variable"].unique()
-        if v not in connections["variable"].unique()
-    ]
-
-    for v in _disconnections:
-        timeline.drop(timeline[timeline.variable == v].index, inplace=True)
-
-    return timeline
+    # A single `drop` makes one (new) timeline, rather than copying the original and then dropping each variable in turn
+    return timeline.drop(
+        timeline.index[~timeline["variable"].isin(connections["variable"].unique())]
+    )
 
 
 def add_cycle(
@@ -86,7 +85,7 @@ def add_cycle(
     device="device_001",
 ):
     """
-    Inserts a new `cycle` column into the timeline as a conversion of the `time` column into 'number of cycles'.
+    Inserts a new `cycle` column into the timeline as a conversion of the `time` column into 'number of cycles'. Cycles that are already known (e.g. from expanding the ramps on the cycle grid, see `timeline.expand`) are kept as they are.
 
     Parameters:
     - df: DataFrame containing the experimental data.
@@ -112,9 +111,10 @@ def add_cycle(
         )
 
     # Calculate cycles and handle special contexts
-    timeline["cycle"] = np.round(timeline["time"].values / cycle_period).astype(
-        np.int32
-    )
+    cycles = np.round(timeline["time"].values / cycle_period)
+    if "cycle" in timeline.columns:
+        cycles = np.where(timeline["cycle"].isna(), cycles, timeline["cycle"])
+    timeline["cycle"] = cycles.astype(np.int32)
 
     # Apply special context cycles
     timeline = wt_frame.replace_column__filtered(
@@ -126,17 +126,20 @@ def add_cycle(
     return timeline
 
 
-def initialize_ADwin(machine__adwin, output, specifications=SPECIFICATIONS__DEFAULT, printDiagnostics=False):
+def initialize_ADwin(machine__adwin, output, specifications=SPECIFICATIONS__DEFAULT, printDiagnostics=False, chunk_size=wt_config.ADWIN__UPLOAD__CHUNK_SIZE, uploader=None):
     """
     General setup of the *system*, rather than the specific experimental project.
 
+    `output` can be in either format of `output` (lists of tuples or columns). The data arrays are sent in chunks of `chunk_size` values (see `adwin.upload`). Where an `adwin.upload.Uploader` is given (and kept from shot to shot), only the parameters and values that have changed since the previous shot are sent (in chunks of the uploader's `chunk_size`).
+
     NOTE: Stateful.
     """
     # TODO:
     # - This would probably be easier if it accepted a dataframe
     # - Should we prepare all of the possible variables or does this waste memory?
 
-    cycles = np.array([np.array(output[i])[:, 0] for i in range(2)]).flatten()
+    output = [adwin_upload.to_columns(o) for o in output]
+    cycles = np.concatenate([o[0] for o in output])
     # Finds the maximum cycle value, discounting special contexts
     time_end__cycles = cycles[~np.isin(cycles, list(CONTEXTS__SPECIAL.values()))].max()
 
@@ -148,19 +151,21 @@ def initialize_ADwin(machine__adwin, output, specifications=SPECIFICATIONS__DEFA
         )
 
     # TODO: What's happening below should be explained here
-    machine__adwin.Set_Par(1, int(time_end__cycles))
-    machine__adwin.Set_Par(2, len(output[0]))
-    machine__adwin.Set_Par(3, len(output[1]))
+    pars = {1: int(time_end__cycles), 2: output[0].shape[1], 3: output[1].shape[1]}
 
-    machine__adwin.SetData_Long([a[0] for a in output[0]], 10, 1, len(output[0]))
-    machine__adwin.SetData_Long([a[1] for a in output[0]], 11, 1, len(output[0]))
-    machine__adwin.SetData_Long([a[2] for a in output[0]], 12, 1, len(output[0]))
-    machine__adwin.SetData_Long([a[3] for a in output[0]], 13, 1, len(output[0]))
+    if uploader is None:
+        for index, value in pars.items():
+            machine__adwin.Set_Par(index, value)
+        statistics = adwin_upload.send_output(machine__adwin, output, chunk_size=chunk_size)
+    else:
+        statistics = uploader.send(machine__adwin, output, pars=pars)
 
-    machine__adwin.SetData_Long([d[0] for d in output[1]], 20, 1, len(output[1]))
-    machine__adwin.SetData_Long([d[1] for d in output[1]], 21, 1, len(output[1]))
-    machine__adwin.SetData_Long([d[2] for d in output[1]], 22, 1, len(output[1]))
-    machine__adwin.SetData_Long([d[3] for d in output[1]], 23, 1, len(output[1]))
+    if (printDiagnostics) :
+        print(
+            "=== upload: {} bytes in {} calls, {:.1f} MB/s ===".format(
+                statistics.bytes, statistics.calls, statistics.bytes_per_second / 1e6
+            )
+        )
 
     return machine__adwin
 
@@ -169,22 +174,23 @@ def check_safety_range(timeline):
     """
     Checks whether the values sent to this device fall inside its safety range.
     """
-    for variable, group in timeline.groupby("variable"):
-        if group["safety_range"].any():
-            if max(group["value"].values) > max(group["safety_range"].values[0]):
+    # The extremes of every variable are found in a single pass, rather than group by group
+    groups = timeline.groupby("variable", observed=True)
+    extremes = groups["value"].agg(["max", "min"])
+    for variable, safety_range in groups["safety_range"].first().items():
+        if wt_util.is_collection(safety_range):
+            if extremes.at[variable, "max"] > max(safety_range):
                 raise ValueError(
                     "{} was given a value of {}, which is higher than its maximum safe limit. Please provide values only inside it's safety range.".format(
-                        variable, max(group["value"].values)
+                        variable, extremes.at[variable, "max"]
                     )
                 )
-            elif min(group["value"].values) < min(group["safety_range"].values[0]):
+            elif extremes.at[variable, "min"] < min(safety_range):
                 raise ValueError(
                     "{} was given a value of {}, which is lower than its minimum safe limit. Please provide values only inside it's safety range.".format(
-                        variable, min(group["value"].values)
+                        variable, extremes.at[variable, "min"]
                     )
                 )
-            else:
-                pass
 
 
 def sanitize_special_contexts(timeline, special_contexts=CONTEXTS__SPECIAL):
@@ -194,7 +200,7 @@ def sanitize_special_contexts(timeline, special_contexts=CONTEXTS__SPECIAL):
     Similarly, the time values are adjusted to avoid automatic removal later on.
     """
     df = timeline[timeline["context"].isin(special_contexts)]
-    df_N = df.groupby(["variable", "context"])["value"].count()
+    df_N = df.groupby(["variable", "context"], observed=True)["value"].count()
     duplicates = df_N[df_N > 1].reset_index()
     duplicates.columns = ["variable", "context", "variable_occurences"]
 
@@ -211,7 +217,16 @@ def sanitize_special_contexts(timeline, special_contexts=CONTEXTS__SPECIAL):
 
 
 def sanitize_types(timeline, schema=SCHEMA):
-    return timeline.astype(schema)
+    """
+    Casts the columns to the types of the `schema`. Categorical labels (see `wigner_time.internal.dataframe.encode`) are already strings and are left as they are.
+    """
+    return timeline.astype(
+        {
+            k: v
+            for k, v in schema.items()
+            if not ((v is str) and wt_frame.is_categorical(timeline[k]))
+        }
+    )
 
 
 def sanitize__drop_duplicates(
@@ -246,7 +261,7 @@ def add_linear_conversion(timeline, unit, separator="__", column__new="value__di
 
     unit: string.
     """
-    dff = deepcopy(timeline)
+    dff = wt_frame.copy(timeline)
     mask = dff["variable"].str.contains(separator + unit + "$")
 
     if mask.any():
@@ -265,73 +280,128 @@ def add(timeline, adwin_connections, devices, specifications=SPECIFICATIONS__DEF
     Digital: module 1
     Analogue otherwise
     """
+    return wt_frame.decode(
+        _add(timeline, adwin_connections, devices, specifications=specifications)
+    )
+
+
+def _add(timeline, adwin_connections, devices, specifications=SPECIFICATIONS__DEFAULT):
+    """
+    `add`, but with the 'variable' and 'context' columns left as categoricals (see `wigner_time.internal.dataframe.encode`). An expanded timeline repeats a handful of labels many times, so the string matching and grouping below is done once per label rather than once per row.
+    """
     # TODO: parameterize the column names
     # TODO: Add vectorization to the python overview talk
     # TODO: Anything that is not voltage should be converted using a functor from the devices layer, which should be a set of conversion functors from units like A, MHz
     #       (this might actually be an overkill: as long as the device is linear, supplying unit_range is sufficient for the conversion, so the functor is necessary only for nonlinear devices)
 
-    dff = timeline.join(
-        adwin_connections.set_index("variable"),
-        on="variable",
-    )
-
-    dff = dff.join(
-        devices.set_index("variable"),
-        on="variable",
+    # The parameters of every variable are worked out once and every row gets them from a single join
+    table = resolutions(adwin_connections, devices, specifications)
+    dff = wt_frame.encode(
+        wt_frame.join(timeline, table.drop(columns=COLUMNS__RESOLUTION))
     )
 
     dff = dff.sort_values(by=["time"], ignore_index=True)
 
-    for variable, group in dff.groupby("variable"):
-        if (dff["variable"].str.contains("__A", regex=False)).any():
-            mask_current = group["variable"].str.contains("__A", regex=False)
+    # The conversion factor of the variable of every row (NaN for the rows that aren't converted linearly), by way of the categorical codes
+    parameters = table.drop_duplicates("variable").set_index("variable")
+    digits_per_unit = np.append(
+        parameters["digits_per_unit"]
+        .reindex(dff["variable"].cat.categories)
+        .to_numpy(dtype=float),
+        np.nan,
+    )[dff["variable"].cat.codes.to_numpy()]
+
+    values = dff["value"].to_numpy(dtype=float)
+    value_digits = np.full(len(dff), np.nan)
+    is_analogue = ~np.isnan(digits_per_unit)
+    # As `conversion.unit_to_digits`
+    value_digits[is_analogue] = np.round(
+        values[is_analogue] * digits_per_unit[is_analogue] + 2 ** (16 - 1)
+    ).astype(int)
 
-            # Check if the variable contains "__A" in its name
-            if mask_current.any():
-                # Get the unit_range from the rows with "__A" in their name
-                unit_range = group.loc[mask_current, "unit_range"].iloc[0]
+    mask = dff["module"] != 1
+    value_digits[~mask.to_numpy()] = np.round(values[~mask.to_numpy()])
+    dff["value_digits"] = value_digits
 
-                dff.loc[group.index[mask_current], "value_digits"] = (
-                    conv.unit_to_digits(
-                        group.loc[mask_current, "value"], unit_range=unit_range
-                    )
-                )
+    check_safety_range(dff)
 
-        if (dff["variable"].str.contains("__V", regex=False)).any():
-            mask_voltage = group["variable"].str.contains("__V", regex=False)
+    return sanitize(add_cycle(dff, specifications))
 
-            # Check if the variable contains "__V" in its name
-            if mask_voltage.any():
-                # Get the unit_range from the rows with "__V" in their name
-                unit_range = group.loc[mask_voltage, "unit_range"].iloc[0]
 
-                dff.loc[group.index[mask_voltage], "value_digits"] = (
-                    conv.unit_to_digits(
-                        group.loc[mask_voltage, "value"], unit_range=unit_range
-                    )
-                )
+COLUMNS__RESOLUTION = ["unit", "is_digital", "digits_per_unit"]
+"""The columns that `resolutions` adds to the connections and devices."""
+
 
-        if (dff["variable"].str.contains("__MHz", regex=False)).any():
-            mask_frequency = group["variable"].str.contains("__MHz", regex=False)
+def resolutions(connections, devices, specifications=SPECIFICATIONS__DEFAULT):
+    """
+    The connections, joined with the devices, along with what is needed to convert the values of each variable to the values that ADwin outputs (see `add`):
+    - 'unit': the analogue unit (of `UNITS__ANALOGUE`) that the name of the variable contains, where there is one (the last one, if there are several);
+    - 'is_digital': whether the variable is connected to a digital module;
+    - 'digits_per_unit': the linear conversion factor (as in `conversion.unit_to_digits`, with 16 bits) for variables with a unit and a `unit_range`. NaN otherwise.
 
-            # Check if the variable contains "__MHz" in its name
-            if mask_frequency.any():
-                # Get the unit_range from the rows with "__MHz" in their name
-                unit_range = group.loc[mask_frequency, "unit_range"].iloc[0]
+    NOTE: The string matching is done once per connection, rather than for every row of a timeline.
+    """
+    table = wt_frame.join(connections, devices)
+    variables = table["variable"].astype(str)
 
-                dff.loc[group.index[mask_frequency], "value_digits"] = (
-                    conv.unit_to_digits(
-                        group.loc[mask_frequency, "value"], unit_range=unit_range
-                    )
-                )
+    unit = np.full(len(table), None, dtype=object)
+    for u in UNITS__ANALOGUE:
+        unit[variables.str.contains(u, regex=False).to_numpy()] = u
 
-    mask = dff["module"] != 1
+    unit_ranges = (
+        table["unit_range"] if "unit_range" in table.columns else [np.nan] * len(table)
+    )
+    digits_per_unit = np.array(
+        [
+            # NOTE: The range is taken in the given order
+            (2**16 / (r[1] - r[0]))
+            if (u is not None) and wt_util.is_collection(r)
+            else np.nan
+            for u, r in zip(unit, unit_ranges)
+        ],
+        dtype=float,
+    )
+
+    return table.assign(
+        unit=unit,
+        is_digital=table["module"].isin(modules_digital(specifications)).to_numpy(),
+        digits_per_unit=digits_per_unit,
+    )
 
-    dff.loc[~mask, "value_digits"] = round(dff["value"])
 
-    check_safety_range(dff)
+def digitizers(connections, devices, specifications=SPECIFICATIONS__DEFAULT):
+    """
+    The functions that convert the values of each variable into the values that ADwin outputs (the 'value_digits'), following `add`: digital channels are rounded and analogue channels (currents, voltages and frequencies) are converted linearly according to their `unit_range`.
 
-    return sanitize(add_cycle(dff, specifications))
+    For use with `timeline.expand`, such that only the samples that change the output of the ADwin are kept.
+    """
+    digitizers = {}
+    for row in resolutions(connections, devices, specifications).itertuples(
+        index=False
+    ):
+        if row.is_digital:
+            digitizers[row.variable] = np.round
+        elif not np.isnan(row.digits_per_unit):
+            digitizers[row.variable] = functools.partial(
+                conv.unit_to_digits, unit_range=row.unit_range
+            )
+    return digitizers
+
+
+def tolerances(
+    connections, devices, digits=1.0, specifications=SPECIFICATIONS__DEFAULT
+):
+    """
+    A tolerance (see `timeline.expand`) of the given number of `digits`, in the units of each of the analogue variables that `digitizers` converts linearly.
+    """
+    num_bits = 16  # As in `add` (see `conversion.unit_to_digits`)
+    return {
+        row.variable: digits * (max(row.unit_range) - min(row.unit_range)) / 2**num_bits
+        for row in resolutions(connections, devices, specifications).itertuples(
+            index=False
+        )
+        if not (row.is_digital or np.isnan(row.digits_per_unit))
+    }
 
 
 def modules_digital(specifications):
@@ -346,17 +416,29 @@ def modules_digital(specifications):
     return [int(1)]
 
 
+def to_columns(timeline, cols=["cycle", "module", "channel", "value_digits"]):
+    """
+    The given columns as a single (len(cols), N) array of `int32`s, such that every column is a contiguous array that can be handed to ADwin (`SetData_Long`) as it is, without making a Python object for every value.
+    """
+    columns = np.empty((len(cols), len(timeline)), dtype=np.int32)
+    for i, col in enumerate(cols):
+        columns[i] = timeline[col].to_numpy()
+    return columns
+
+
 def to_tuples(timeline, cols=["cycle", "module", "channel", "value_digits"]):
-    return [tuple([np.int32(i) for i in x]) for x in timeline[cols].values]
+    return list(zip(*to_columns(timeline, cols)))
 
 
-def output(timeline, specifications=SPECIFICATIONS__DEFAULT):
+def output(timeline, specifications=SPECIFICATIONS__DEFAULT, is_columnar=False):
     """
     Takes a dataframe of the experimental run and converts the result to an 'Output' format that can be processed by ADwin.
 
 
     return [[(cycle, module, channel, value), ...],
     [(cycle, channel, value), ...]]
+
+    or, if `is_columnar`, [analogue, digital], where each is a (4, N) array of `int32`s, i.e. the contiguous arrays of the cycles, modules, channels and values (see `to_columns`).
     """
     # TODO: ensure digital outputs are integers
     # TODO: sort table by cycle before export
@@ -372,11 +454,10 @@ def output(timeline, specifications=SPECIFICATIONS__DEFAULT):
         int(x) for x in timeline["module"].unique() if x not in mods_digital
     ]
 
+    convert = to_columns if is_columnar else to_tuples
     return [
-        to_tuples(timeline.query("module in {}".format(mods_analogue))),
-        to_tuples(
-            timeline.query("module in {}".format(mods_digital)),
-        ),
+        convert(timeline[timeline["module"].isin(mods_analogue)]),
+        convert(timeline[timeline["module"].isin(mods_digital)]),
     ]
 
 
@@ -386,12 +467,28 @@ def to_data(
     devices,
     adwin_settings=SPECIFICATIONS__DEFAULT,
     time_resolution=None,
+    is_cycle_grid=False,
+    is_quantized=False,
+    tolerance__digits=None,
+    is_held=True,
+    is_cached=False,
+    is_columnar=False,
 ):
     """
     Convenience for converting a Wigner timeline (DataFrame) to an ADbasic-compatible list of tuples.
 
     This takes an operation-layer timeline, adds the columns necessary for an ADwin conversion, based on the supplied or default specifications, and then converts the relevant columns according to `adwin.output`, i.e.  [[(cycle, module, channel, value), ...],
     [(cycle, module, channel, value), ...]].
+
+    `is_cycle_grid` samples the ramps directly on the ADwin cycles (see `timeline.expand`), rather than in time, which avoids creating samples that fall on the same cycle only to remove them again. This changes the output: the ends of the ramps are rounded to the nearest cycle, i.e. move by up to half a cycle, and so the held outputs on steep ramps differ (on the demo experiment, by up to 49 digits), while the number of events stays the same (19233 analogue events on the demo, where the expansion has 13 fewer rows, which would otherwise have been dropped as duplicates).
+
+    `is_quantized` only keeps the samples of ramps where the output of the ADwin changes (see `digitizers`), which doesn't change what the ADwin outputs, as it holds the output of a channel until the next sample.
+
+    `tolerance__digits` compresses the analogue ramps (see `tolerances`). By default (`is_held`), a sample is only dropped where its value is within the given number of digits of the last sample kept, such that the output of the ADwin, which holds each value until the next sample, stays within that number of digits (along with the rounding to digits) of the uncompressed output. Otherwise, the samples needed for linear interpolation between them to stay within the given number of digits are kept (see `timeline.expand`), which gives fewer samples, but this bound doesn't hold on the ADwin: on the demo, `tolerance__digits=1` moves the held output by up to ~3200 digits.
+
+    `is_cached` takes the samples of ramps that haven't changed since an earlier call from a cache (see `timeline.expand`), which speeds up recompiling a sequence where only a few ramps change, e.g. in a scan.
+
+    `is_columnar` gives contiguous arrays of `int32`s rather than lists of tuples (see `output`), which `initialize_ADwin` also accepts.
     """
 
     if time_resolution is not None:
@@ -403,11 +500,29 @@ def to_data(
         lambda tline: output(
             tline,
             specifications=adwin_settings,
+            is_columnar=is_columnar,
         ),
-        lambda tline: add(tline, connections, devices, specifications=adwin_settings),
+        lambda tline: _add(tline, connections, devices, specifications=adwin_settings),
         lambda tline: tl.expand(
             tline,
             time_resolution=resolution,
+            cycle_period=(
+                adwin_settings["device_001"]["cycle_period__normal__us"]
+                if is_cycle_grid
+                else None
+            ),
+            digitizers=(
+                digitizers(connections, devices, adwin_settings)
+                if is_quantized
+                else None
+            ),
+            tolerance=(
+                tolerances(connections, devices, tolerance__digits, adwin_settings)
+                if tolerance__digits is not None
+                else None
+            ),
+            is_held=is_held,
+            cache=True if is_cached else None,
         ),
         lambda tline: remove_unconnected_variables(tline, connections),
     )(timeline)
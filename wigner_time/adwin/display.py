@@ -15,6 +15,7 @@ import numpy as np
 
 from wigner_time.adwin import core as adwin
 from wigner_time import timeline as tl
+from wigner_time.internal import dataframe as wt_frame
 
 
 def _draw_context(axis: mpa.Axes, info__context, alpha=0.1):
@@ -101,11 +102,14 @@ def channels(
 
     fig.tight_layout()
 
+    rows = wt_frame.groups(timeline)
+    rows__empty = timeline.iloc[:0]
+
     analogLabels = []
     for key, axis in zip(analog_variables.keys(), axes[:-1]):
         axis.set_ylabel(key + " [{}]".format(suffixes__analogue[key][2:]))
         for variable, color in zip(analog_variables[key], colors):
-            array = timeline[timeline["variable"] == variable]
+            array = rows.get(variable, rows__empty)
             axis.plot(array["time"], array["value"], marker="o", ms=3)
             analogLabels.append(axis.text(0, array.iat[0, 2], variable, color=color))
         if do_context:
@@ -120,7 +124,7 @@ def channels(
     ):
 
         baseline = offset / divider
-        array = timeline[timeline["variable"] == variable]
+        array = rows.get(variable, rows__empty)
         axes[-1].axhline(baseline, color=color, linestyle=":", alpha=0.5)
         axes[-1].axhline(baseline + 1, color=color, linestyle=":", alpha=0.5)
         axes[-1].step(
@@ -145,7 +149,7 @@ def channels(
         ax.axvspan(-0.75, 0, color="gray", alpha=0.3)
         ax.axvspan(max_time, max_time + 0.5, color="gray", alpha=0.3)
 
-    anchors = timeline[timeline["variable"] == "Anchor"]
+    anchors = rows.get("Anchor", rows__empty)
     for anchorTime in anchors["time"]:
         for axis in axes:
             axis.axvline(anchorTime, color="0.5", linestyle="--")
@@ -0,0 +1,161 @@
+"""
+A stand-in for the ADwin driver (the `ADwin.ADwin` class of the ADwin Python package), for developing and benchmarking the path from `adwin.core.to_data` to the ADwin (see `adwin.core.initialize_ADwin` and `adwin.upload`) without the hardware.
+
+Only the part of the driver's API that `wigner_time` uses is implemented: the parameters (`Set_Par`, `Get_Par`), the data arrays (`SetData_Long`, `GetData_Long`, `Data_Length`) and the processes (`Load_Process`, `Start_Process`, `Stop_Process`, `Process_Status`). The data arrays are stored faithfully (with ADwin's 1-based indices), such that what was uploaded can be checked, and are only as large as what has been written to them.
+
+Every call takes (i.e. sleeps for) the given `latency`, along with the time that its data takes at the given `bandwidth`, such that the timing of a real connection can be imitated. The calls and the amount of data are counted in `statistics`.
+"""
+
+import time
+
+from munch import Munch
+import numpy as np
+
+###############################################################################
+#                   Constants                                                 #
+###############################################################################
+
+DIMENSIONS = {
+    10: 10_000_000,
+    11: 10_000_000,
+    12: 10_000_000,
+    13: 10_000_000,
+    20: 10_000,
+    22: 10_000,
+    23: 10_000,
+}
+"""The data arrays declared by the ADwin program (`resources/ADwin/WignerTimeADwin.bas`), i.e. `analogMaxArrayDim` and `digitalMaxArrayDim`. NOTE: `data_21` (the modules of the digital events) isn't declared, as there is only one digital module."""
+
+NUM__PARS = 80
+"""The number of (integer) global parameters of the ADwin, i.e. `Par_1`-`Par_80`."""
+
+###############################################################################
+#                   Classes                                                   #
+###############################################################################
+
+
+class ADwin:
+    """
+    A stand-in for `ADwin.ADwin`. See the module documentation.
+
+    `dimensions` are the lengths of the declared data arrays (by number). Writing outside of them raises a ValueError, unless `is_strict` is `False`, where arrays that aren't declared are created on the fly (e.g. `data_21`, which `initialize_ADwin` sends anyway).
+
+    `latency` is in seconds per call and `bandwidth` in bytes per second (`None` for no limit).
+    """
+
+    def __init__(
+        self, dimensions=DIMENSIONS, is_strict=False, latency=0.0, bandwidth=None
+    ):
+        self.dimensions = dict(dimensions)
+        self.is_strict = is_strict
+        self.latency = latency
+        self.bandwidth = bandwidth
+
+        self.pars = np.zeros(NUM__PARS + 1, dtype=np.int32)
+        self.data = {}
+        self.processes = {}
+        self.files = []
+        self.statistics = Munch(calls=0, bytes__sent=0, bytes__received=0, seconds=0.0)
+
+    def _call(self, num__bytes=0, is_sent=True):
+        """
+        Counts a call and takes the time that it would take.
+        """
+        seconds = self.latency
+        if self.bandwidth is not None:
+            seconds += num__bytes / self.bandwidth
+        if seconds > 0:
+            time.sleep(seconds)
+
+        self.statistics.calls += 1
+        self.statistics.seconds += seconds
+        if is_sent:
+            self.statistics.bytes__sent += num__bytes
+        else:
+            self.statistics.bytes__received += num__bytes
+
+    def _check_par(self, index):
+        if not (1 <= index <= NUM__PARS):
+            raise ValueError("Par_{} doesn't exist (1 to {}).".format(index, NUM__PARS))
+
+    def _check_data(self, data_number, start, count):
+        if data_number not in self.dimensions:
+            if self.is_strict:
+                raise ValueError(
+                    "data_{} isn't declared by the ADwin program.".format(data_number)
+                )
+            return
+        if (start < 1) or (start - 1 + count > self.dimensions[data_number]):
+            raise ValueError(
+                "Indices {} to {} are outside of data_{} (1 to {}).".format(
+                    start,
+                    start - 1 + count,
+                    data_number,
+                    self.dimensions[data_number],
+                )
+            )
+
+    # Parameters
+
+    def Set_Par(self, Index, Value):
+        self._check_par(Index)
+        self._call()
+        self.pars[Index] = Value
+
+    def Get_Par(self, Index):
+        self._check_par(Index)
+        self._call(is_sent=False)
+        return int(self.pars[Index])
+
+    # Data arrays
+
+    def Data_Length(self, DataNo):
+        self._call(is_sent=False)
+        if DataNo in self.dimensions:
+            return self.dimensions[DataNo]
+        return len(self.data.get(DataNo, []))
+
+    def SetData_Long(self, Data, DataNo, Startindex, Count):
+        self._check_data(DataNo, Startindex, Count)
+        values = np.asarray(Data[:Count], dtype=np.int32)
+        if len(values) < Count:
+            raise ValueError(
+                "{} values were given, rather than {}.".format(len(values), Count)
+            )
+        self._call(values.nbytes)
+
+        # The arrays grow (to the last index written) as they are written, rather than being allocated at their full dimension
+        array = self.data.get(DataNo, np.zeros(0, dtype=np.int32))
+        stop = Startindex - 1 + Count
+        if stop > len(array):
+            array = np.concatenate([array, np.zeros(stop - len(array), np.int32)])
+        array[Startindex - 1 : stop] = values
+        self.data[DataNo] = array
+
+    def GetData_Long(self, DataNo, Startindex, Count):
+        self._check_data(DataNo, Startindex, Count)
+        values = np.zeros(Count, dtype=np.int32)
+        array = self.data.get(DataNo, values[:0])[
+            Startindex - 1 : Startindex - 1 + Count
+        ]
+        values[: len(array)] = array
+        self._call(values.nbytes, is_sent=False)
+        return values
+
+    # Processes
+
+    def Load_Process(self, Filename):
+        self._call()
+        self.files.append(Filename)
+
+    def Start_Process(self, ProcessNo):
+        self._call()
+        self.processes[ProcessNo] = 1
+
+    def Stop_Process(self, ProcessNo):
+        self._call()
+        self.processes[ProcessNo] = 0
+
+    def Process_Status(self, ProcessNo):
+        self._call(is_sent=False)
+        return self.processes.get(ProcessNo, 0)
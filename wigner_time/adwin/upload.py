@@ -0,0 +1,235 @@
+"""
+Sending the output of `adwin.core` (see `adwin.core.output`) to the ADwin, in chunks.
+
+The ADwin program (see `resources/ADwin/WignerTimeADwin.bas`) reads the events from eight data arrays: the cycles, modules, channels and values of the analogue (`data_10`-`data_13`) and digital (`data_20`-`data_23`) events. Near the size limit of the analogue arrays (`analogMaxArrayDim`, i.e. 10,000,000 events), building a Python list for every array takes longer than sending it. Here, the arrays are sent as contiguous `int32` buffers, in chunks (using the start index of `SetData_Long`), while the next chunk is prepared in a background thread. The throughput is reported in the returned statistics.
+
+In scans, consecutive shots usually differ in a handful of events. An `Uploader` remembers (the hashes of the blocks of) what it last sent and only sends the blocks that have changed, along with the parameters that have changed.
+"""
+
+import concurrent.futures
+import hashlib
+import time
+
+from munch import Munch
+import numpy as np
+
+from wigner_time import config as wt_config
+
+###############################################################################
+#                   Constants                                                 #
+###############################################################################
+
+DATA_NUMBERS = [[10, 11, 12, 13], [20, 21, 22, 23]]
+"""The numbers of the ADwin data arrays for the columns (cycle, module, channel, value) of the analogue and digital streams of `adwin.core.output`."""
+
+###############################################################################
+#                   Utility functions                                         #
+###############################################################################
+
+
+def to_columns(stream):
+    """
+    A stream of `adwin.core.output`, either as a list of (cycle, module, channel, value) tuples or already as columns, as a (4, N) array of `int32`s.
+    """
+    if isinstance(stream, np.ndarray):
+        return stream
+    return np.array(stream, dtype=np.int32).reshape(-1, 4).T
+
+
+def chunks(num, chunk_size):
+    """
+    The (start, stop) indices of the chunks of an array of `num` values.
+    """
+    starts = range(0, num, max(int(chunk_size), 1))
+    return [(start, min(start + chunk_size, num)) for start in starts]
+
+
+def _prepare(values, start, stop):
+    return np.ascontiguousarray(values[start:stop], dtype=np.int32)
+
+
+def _statistics(num__bytes, num__calls, seconds):
+    return Munch(
+        bytes=num__bytes,
+        calls=num__calls,
+        seconds=seconds,
+        bytes_per_second=(num__bytes / seconds) if seconds > 0 else float("inf"),
+    )
+
+
+def _total(statistics):
+    """
+    The sum of a collection of statistics (see `_statistics`).
+    """
+    return _statistics(
+        sum(s.bytes for s in statistics),
+        sum(s.calls for s in statistics),
+        sum(s.seconds for s in statistics),
+    )
+
+
+def hashes(values, block_size=wt_config.ADWIN__UPLOAD__BLOCK_SIZE):
+    """
+    The hashes of the blocks of `block_size` values of `values` (as `int32`s), as a list.
+    """
+    buffer = np.ascontiguousarray(values, dtype=np.int32)
+    return [
+        hashlib.blake2b(buffer[start:stop], digest_size=16).digest()
+        for start, stop in chunks(len(buffer), block_size)
+    ]
+
+
+def changes(
+    hashes__new, hashes__old, num, block_size=wt_config.ADWIN__UPLOAD__BLOCK_SIZE
+):
+    """
+    The (start, stop) indices of the values (of an array of `num` values) that have changed, given the hashes of the blocks of the new and the old values (see `hashes`). Neighbouring blocks that have changed are merged into a single range.
+    """
+    is_changed = np.array(
+        [
+            (i >= len(hashes__old)) or (h != hashes__old[i])
+            for i, h in enumerate(hashes__new)
+        ],
+        dtype=bool,
+    )
+    # The edges of the runs of changed blocks
+    edges = np.flatnonzero(np.diff(np.concatenate([[0], is_changed, [0]]).astype(int)))
+    return [
+        (int(start) * block_size, min(int(stop) * block_size, num))
+        for start, stop in edges.reshape(-1, 2)
+    ]
+
+
+###############################################################################
+#                   Upload                                                    #
+###############################################################################
+
+
+def send(
+    machine__adwin,
+    values,
+    data_number,
+    chunk_size=wt_config.ADWIN__UPLOAD__CHUNK_SIZE,
+    start=0,
+    executor=None,
+):
+    """
+    Sends the `values` (any array-like of integers) to the ADwin data array `data_number`, from the (0-based) index `start`, in chunks of `chunk_size` values.
+
+    Every chunk is converted into a contiguous `int32` buffer before it is sent. The conversion of the next chunk is done in the background (by `executor`, where given), while the current chunk is being transferred. Returns the statistics of the transfer: bytes, calls (to `SetData_Long`), seconds and bytes_per_second.
+    """
+    intervals = chunks(len(values), chunk_size)
+    if not intervals:
+        return _statistics(0, 0, 0.0)
+
+    is_owned = executor is None
+    if is_owned:
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    try:
+        num__bytes = 0
+        time__start = time.perf_counter()
+        prepared = executor.submit(_prepare, values, *intervals[0])
+        for i, (start__chunk, stop__chunk) in enumerate(intervals):
+            chunk = prepared.result()
+            if i + 1 < len(intervals):
+                prepared = executor.submit(_prepare, values, *intervals[i + 1])
+            # NOTE: ADwin arrays start at 1
+            machine__adwin.SetData_Long(
+                chunk, data_number, start + start__chunk + 1, len(chunk)
+            )
+            num__bytes += chunk.nbytes
+        seconds = time.perf_counter() - time__start
+    finally:
+        if is_owned:
+            executor.shutdown()
+
+    return _statistics(num__bytes, len(intervals), seconds)
+
+
+def send_output(machine__adwin, output, chunk_size=wt_config.ADWIN__UPLOAD__CHUNK_SIZE):
+    """
+    Sends both streams of `output` (see `adwin.core.output`) to their data arrays (see `DATA_NUMBERS`), using `send`. Returns the statistics of the whole transfer, along with those of every data array (by number, under 'arrays').
+    """
+    statistics = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        for stream, numbers in zip(output, DATA_NUMBERS):
+            columns = to_columns(stream)
+            for values, number in zip(columns, numbers):
+                statistics[number] = send(
+                    machine__adwin,
+                    values,
+                    number,
+                    chunk_size=chunk_size,
+                    executor=executor,
+                )
+
+    total = _total(statistics.values())
+    total.arrays = statistics
+    return total
+
+
+class Uploader:
+    """
+    Sends the output of `adwin.core` (see `send_output`) to an ADwin, shot after shot, where only what has changed since the previous shot is sent.
+
+    The hashes of the blocks of `block_size` values of every data array (see `hashes`), along with the parameters, that were last sent are kept. The runs of blocks that have changed are sent (using `send`, with the start index of the run). The values beyond the end of a shorter array are left as they are, as the ADwin program only reads as many events as it is given (`Par_2` and `Par_3`).
+
+    NOTE: The ADwin is assumed to keep what it was sent. After the ADwin has been rebooted (or sent anything by other means), call `reset`, such that everything is sent again.
+    """
+
+    def __init__(
+        self,
+        block_size=wt_config.ADWIN__UPLOAD__BLOCK_SIZE,
+        chunk_size=wt_config.ADWIN__UPLOAD__CHUNK_SIZE,
+    ):
+        self.block_size = block_size
+        self.chunk_size = chunk_size
+        self.reset()
+
+    def reset(self):
+        """
+        Forgets what was sent, such that everything is sent next time.
+        """
+        self.pars = {}
+        self.hashes = {}
+
+    def send(self, machine__adwin, output, pars={}):
+        """
+        Sends the parameters `pars` (a dictionary of index: value) and both streams of `output` (see `send_output`), as far as they have changed. Returns the statistics of the transfer of the data arrays, along with those of every data array (by number, under 'arrays') and the indices of the parameters that were set (under 'pars').
+        """
+        pars__set = []
+        for index, value in pars.items():
+            if self.pars.get(index) != value:
+                machine__adwin.Set_Par(index, value)
+                self.pars[index] = value
+                pars__set.append(index)
+
+        statistics = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+            for stream, numbers in zip(output, DATA_NUMBERS):
+                columns = to_columns(stream)
+                for values, number in zip(columns, numbers):
+                    hashes__new = hashes(values, self.block_size)
+                    # Forgotten until sent, in case the transfer fails
+                    hashes__old = self.hashes.pop(number, [])
+                    statistics[number] = _total(
+                        [
+                            send(
+                                machine__adwin,
+                                values[start:stop],
+                                number,
+                                chunk_size=self.chunk_size,
+                                start=start,
+                                executor=executor,
+                            )
+                            for start, stop in changes(
+                                hashes__new, hashes__old, len(values), self.block_size
+                            )
+                        ]
+                    )
+                    self.hashes[number] = hashes__new
+
+        total = _total(statistics.values())
+        total.arrays = statistics
+        total.pars = pars__set
+        return total
@@ -1,5 +1,7 @@
 """
 Utility functions related to setting, finding and querying anchors in a timeline.
+
+Timelines that are being built (see `wigner_time.internal.builder`) keep a table of their anchors, so that these queries don't need to scan every row.
 """
 
 # TODO: Not sure if this should be a separate file or not.
@@ -26,15 +28,30 @@ def mask(timeline, context=None):
 def is_available(timeline, context=None) -> bool:
     if timeline is None:
         return False
+    if wt_frame.is_builder(timeline):
+        return timeline.anchor__last(context=context) is not None
     return (mask(timeline, context=context)).any()
 
 
+def count(timeline) -> int:
+    """
+    The number of distinct anchors in the timeline.
+    """
+    if timeline is None:
+        return 0
+    if wt_frame.is_builder(timeline):
+        return timeline.anchor__count()
+    return timeline["variable"].loc[mask(timeline)].nunique()
+
+
 def last(timeline, context=None):
     """
     The last anchor variable available, optionally filtered by context.
     """
     if timeline is None:
         return None
+    if wt_frame.is_builder(timeline):
+        return timeline.anchor__last(context=context)
 
     df_filt = timeline[mask(timeline, context)]
 
@@ -9,6 +9,24 @@ TIME_RESOLUTION = 1.0e-6
 # List of origins according to priority: first is most important
 ORIGIN__DEFAULTS = [["anchor", None], ["last", None]]
 
+# Whether `timeline.stack` accumulates rows in an append-only builder (rather than concatenating dataframes at every step)
+STACK__BUILDER = True
+
+# The library used for the heavier dataframe operations: "pandas" or "polars" (see `wigner_time.internal.dataframe.set_backend`)
+DATAFRAME__BACKEND = "pandas"
+
+# The number of normalized ramp shapes kept by `wigner_time.ramp_function` (see `wigner_time.internal.cache`)
+CACHE__SHAPES__MAX_ENTRIES = 256
+
+# The bounds of the cache of expanded ramps (see `wigner_time.timeline.expand`)
+CACHE__EXPANSIONS__MAX_ENTRIES = 100_000
+CACHE__EXPANSIONS__MAX_BYTES = 256 * 2**20
+
+# The number of values sent to ADwin in a single `SetData_Long` call (see `wigner_time.adwin.upload`)
+ADWIN__UPLOAD__CHUNK_SIZE = 2**20
+# The number of values that are hashed together, to find what has changed since the last upload (see `wigner_time.adwin.upload.Uploader`)
+ADWIN__UPLOAD__BLOCK_SIZE = 2**14
+
 ###############################################################################
 #                   Logging                                                 #
 ###############################################################################
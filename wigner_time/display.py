@@ -11,6 +11,7 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from wigner_time import timeline as tl
+from wigner_time.internal import dataframe as wt_frame
 
 from wigner_time.adwin import display as adwin_display
 
@@ -62,8 +63,9 @@ def display_old(df, xlim=None, variables=None):
         len(variables), sharex=True, squeeze=False, figsize=(7.5, 7.5)
     )  # TODO: make this more flexible, preferably sth like %matplotlib
 
+    rows = wt_frame.groups(df)
     for i, a, d in zip(range(len(variables)), axes[:, 0], variables):
-        dff = df.query("variable=='{}'".format(d))
+        dff = rows[d]
 
         if (
             dff["time"].max() != time_end
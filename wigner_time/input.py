@@ -173,6 +173,63 @@ def rows_from_arguments(*vtvc, time=0.0, context=None, **vtvc_dict):
     return rows_from_input(convert(*vtvc, time=time, context=context, **vtvc_dict))
 
 
+def is_array__time_value(a) -> bool:
+    """
+    Whether `a` is a numeric (N, 2) array of [time, value] pairs.
+    """
+    return (
+        isinstance(a, np.ndarray)
+        and (a.ndim == 2)
+        and (a.shape[1] == 2)
+        and (a.dtype.kind in "biuf")
+    )
+
+
+def columns_from_arguments(
+    *vtvc, time=0.0, context=None, context__default="", **vtvc_dict
+):
+    """
+    A fast path for `rows_from_arguments`, for input that is already in arrays: variables mapped to (N, 2) arrays of [time, value] pairs, given either as keyword arguments or as a single dictionary, e.g.
+    `{"AOM_MOT": np.array([[0.0, 1.0], [1e-6, 0.5], ...])}`
+
+    Returns the columns ('time', 'variable', 'value' and 'context') as arrays, in the same order as the rows of `rows_from_arguments`, or `None` if the input isn't in this form. Other values (e.g. single values or lists) are allowed alongside the arrays, but go through `rows_from_arguments`.
+    """
+    if vtvc:
+        if (len(vtvc) == 1) and isinstance(vtvc[0], dict) and not vtvc_dict:
+            vtvc_dict = vtvc[0]
+        else:
+            return None
+    if not any(is_array__time_value(v) for v in vtvc_dict.values()):
+        return None
+
+    chunks = []
+    for variable, v in vtvc_dict.items():
+        if is_array__time_value(v):
+            num = len(v)
+            chunks.append(
+                [
+                    v[:, 0].astype(float),
+                    np.full(num, variable, dtype=object),
+                    v[:, 1].astype(float),
+                    np.full(
+                        num,
+                        context if context is not None else context__default,
+                        dtype=object,
+                    ),
+                ]
+            )
+        else:
+            rows = rows_from_arguments(time=time, context=context, **{variable: v})
+            chunks.append(
+                [np.array([row[k] for row in rows], dtype=object) for k in range(4)]
+            )
+
+    return {
+        k: np.concatenate([chunk[i] for chunk in chunks])
+        for i, k in enumerate(["time", "variable", "value", "context"])
+    }
+
+
 # =========================================================================
 if __name__ == "__main__":
     convert(
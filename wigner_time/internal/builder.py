@@ -0,0 +1,305 @@
+"""
+An append-only, columnar accumulator for timelines.
+
+Chains of operations (see `timeline.stack`) add a handful of rows at a time. Concatenating dataframes at every step copies the whole timeline, i.e. O(N²) for N steps, whereas a `Builder` copies only the new rows into growable, typed buffers. The dataframe is produced once, when the timeline is actually read.
+
+Builders behave like values rather than containers: `append` returns a new handle and leaves the original untouched. Handles share their buffers as long as the history is linear; appending to an older handle (branching) copies the rows it can see into fresh buffers first.
+"""
+
+import numpy as np
+import pandas as pd
+
+from wigner_time.internal.history import Anchors, History
+
+###############################################################################
+#                   Constants                                                 #
+###############################################################################
+
+CAPACITY__INITIAL = 256
+"""Number of rows allocated for an empty builder. Capacity doubles whenever it is exceeded."""
+
+###############################################################################
+#                   Utility functions                                         #
+###############################################################################
+
+
+def _is_numpy(dtype) -> bool:
+    return isinstance(dtype, np.dtype)
+
+
+def _dtype__common(dtype1, dtype2):
+    """
+    The dtype resulting from concatenating two columns, following `pandas.concat` for the cases relevant to timelines.
+    """
+    if dtype1 == dtype2:
+        return dtype1
+    if (
+        _is_numpy(dtype1)
+        and _is_numpy(dtype2)
+        and dtype1.kind in "iuf"
+        and dtype2.kind in "iuf"
+    ):
+        return np.result_type(dtype1, dtype2)
+    return np.dtype(object)
+
+
+def _dtype__with_missing(dtype):
+    """
+    The dtype needed to hold missing values (NaN) alongside the given dtype.
+    """
+    if _is_numpy(dtype):
+        if dtype.kind == "f":
+            return dtype
+        if dtype.kind in "iu":
+            return np.dtype(float)
+    return np.dtype(object)
+
+
+def _storage(dtype):
+    """
+    Buffers are plain numpy arrays. Extension dtypes (e.g. categorical) are stored as objects and restored on materialization.
+    """
+    return dtype if _is_numpy(dtype) else np.dtype(object)
+
+
+###############################################################################
+#                   Classes                                                   #
+###############################################################################
+
+
+class _Store:
+    """
+    The buffers shared between `Builder` handles.
+    """
+
+    def __init__(self, capacity=CAPACITY__INITIAL):
+        self.buffers = {}
+        self.dtypes = {}
+        self.size = 0
+        self.capacity = capacity
+        self.history = History()
+        self.anchors = Anchors()
+
+    def _reserve(self, size):
+        if size <= self.capacity:
+            return
+        capacity = max(self.capacity, 1)
+        while capacity < size:
+            capacity *= 2
+        for name, buf in self.buffers.items():
+            new = np.empty(capacity, dtype=buf.dtype)
+            new[: self.size] = buf[: self.size]
+            self.buffers[name] = new
+        self.capacity = capacity
+
+    def _add_column(self, name, dtype):
+        dtype__missing = _dtype__with_missing(_storage(dtype))
+        buf = np.empty(self.capacity, dtype=dtype__missing)
+        buf[: self.size] = np.nan
+        self.buffers[name] = buf
+        # A column that didn't exist before is missing for the earlier rows
+        self.dtypes[name] = dtype if self.size == 0 else dtype__missing
+
+    def _recast(self, name, dtype):
+        buf = self.buffers[name]
+        if buf.dtype != dtype:
+            # Only the filled rows are meaningful (the rest is uninitialized)
+            new = np.empty(self.capacity, dtype=dtype)
+            new[: self.size] = buf[: self.size]
+            self.buffers[name] = new
+
+    def append(self, df):
+        num_rows = len(df)
+        for name in df.columns:
+            if name not in self.buffers:
+                self._add_column(name, df[name].dtype)
+
+        self._reserve(self.size + num_rows)
+        if num_rows == 0:
+            # Empty frames contribute columns, but not dtypes (as in `pandas.concat`)
+            return
+
+        for name, buf in self.buffers.items():
+            if name in df.columns:
+                column = df[name]
+                dtype = (
+                    column.dtype
+                    if self.size == 0
+                    else (
+                        self.dtypes[name]
+                        if column.dtype == self.dtypes[name]
+                        else _dtype__common(self.dtypes[name], column.dtype)
+                    )
+                )
+                self._recast(name, _storage(dtype))
+                self.buffers[name][self.size : self.size + num_rows] = column.to_numpy(
+                    dtype=self.buffers[name].dtype, copy=False
+                )
+            else:
+                dtype = _dtype__with_missing(self.dtypes[name])
+                self._recast(name, _storage(dtype))
+                self.buffers[name][self.size : self.size + num_rows] = np.nan
+            self.dtypes[name] = dtype
+
+        self._index(self.size, self.size + num_rows)
+        self.size += num_rows
+
+    def _index(self, start, stop):
+        if {"time", "variable"}.issubset(self.buffers):
+            columns = {
+                name: self.buffers[name][start:stop]
+                for name in ("time", "variable", "value", "context")
+                if name in self.buffers
+            }
+            self.history.add(columns, row__start=start)
+            self.anchors.add(columns, row__start=start)
+
+    def copy(self, size, dtypes):
+        """
+        A new store containing only the first `size` rows of the columns in `dtypes`.
+        """
+        store = _Store(capacity=max(size, CAPACITY__INITIAL))
+        for name, dtype in dtypes.items():
+            store.buffers[name] = np.empty(store.capacity, dtype=_storage(dtype))
+            store.buffers[name][:size] = self.buffers[name][:size]
+        store.dtypes = dict(dtypes)
+        store._index(0, size)
+        store.size = size
+        return store
+
+
+class Builder:
+    """
+    A timeline under construction. See the module documentation.
+
+    Reading from a builder like a dataframe (e.g. `builder["time"]` or `builder.columns`) materializes a snapshot, which is cached until the next append. The snapshot should be treated as read-only.
+    """
+
+    def __init__(self, df=None):
+        self._store = _Store()
+        self._frame = None
+        if df is not None:
+            self._store.append(df)
+        self._size = self._store.size
+        self._dtypes = dict(self._store.dtypes)
+
+    @classmethod
+    def _from_store(cls, store):
+        builder = cls.__new__(cls)
+        builder._store = store
+        builder._size = store.size
+        builder._dtypes = dict(store.dtypes)
+        builder._frame = None
+        return builder
+
+    def __len__(self):
+        return self._size
+
+    def append(self, *dfs):
+        """
+        Returns a new builder with the rows of the given dataframes added at the end.
+        """
+        store = self._store
+        if self._size != store.size:
+            store = store.copy(self._size, self._dtypes)
+
+        for df in dfs:
+            store.append(df)
+
+        return Builder._from_store(store)
+
+    def contains(self, label, column="variable") -> bool:
+        """
+        Whether any row has `label` in the given (indexed) `column`.
+        """
+        return self._store.history.contains(label, column=column, size=self._size)
+
+    def latest(self, label=None, column="variable", time__max=None):
+        """
+        The latest row (as a series, like `DataFrame.loc`) matching `label` in the given (indexed) `column`, optionally no later than `time__max`. `None` if there is no such row.
+
+        When several rows share the latest time, the last one is returned. See `wigner_time.internal.history`.
+        """
+        i = self._store.history.latest(
+            label, column=column, time__max=time__max, size=self._size
+        )
+        return None if i is None else self.row(i)
+
+    def summary(self, label=None, column="variable"):
+        """
+        A summary of the rows matching `label` in the given (indexed) `column`. See `wigner_time.internal.history.History.summary`.
+        """
+        return self._store.history.summary(label, column=column, size=self._size)
+
+    def anchor__count(self) -> int:
+        """
+        The number of distinct anchors. See `wigner_time.anchor`.
+        """
+        return self._store.anchors.count(size=self._size)
+
+    def anchor__latest(self, context=None, time__max=None):
+        """
+        The latest anchor row (as a series), optionally within `context` and no later than `time__max`. `None` if there is no such anchor.
+        """
+        i = self._store.anchors.latest(
+            context=context, time__max=time__max, size=self._size
+        )
+        return None if i is None else self.row(i)
+
+    def anchor__last(self, context=None):
+        """
+        The name of the latest anchor, optionally within `context`, or `None`.
+        """
+        i = self._store.anchors.latest(context=context, size=self._size)
+        return None if i is None else self._store.anchors.name(i)
+
+    def anchors(self) -> pd.DataFrame:
+        """
+        The table of anchors (name, time, context and ordinal), indexed by row.
+        """
+        return self._store.anchors.table(size=self._size, columns=self._store.buffers)
+
+    def is_indexed(self, column) -> bool:
+        return self._store.history.is_indexed(column)
+
+    def row(self, i):
+        """
+        The row at position `i`, as a series.
+        """
+        if self._frame is not None:
+            return self._frame.loc[i]
+        return pd.Series(
+            [self._store.buffers[name][i] for name in self._dtypes],
+            index=list(self._dtypes),
+            name=i,
+            dtype=object,
+        )
+
+    def frame(self) -> pd.DataFrame:
+        """
+        The rows of the builder as a dataframe.
+        """
+        if self._frame is None:
+            # Later appends to the shared buffers may have widened their dtypes
+            self._frame = pd.DataFrame(
+                {
+                    name: pd.Series(
+                        self._store.buffers[name][: self._size], copy=True
+                    ).astype(dtype, copy=False)
+                    for name, dtype in self._dtypes.items()
+                },
+                index=pd.RangeIndex(self._size),
+            )
+        return self._frame
+
+    def __getitem__(self, key):
+        return self.frame()[key]
+
+    def __getattr__(self, name):
+        # Only reached for attributes that the builder itself doesn't define.
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.frame(), name)
+
+    def __repr__(self):
+        return "Builder(rows={})\n{}".format(self._size, repr(self.frame()))
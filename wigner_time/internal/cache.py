@@ -0,0 +1,148 @@
+"""
+A bounded, least-recently-used (LRU) cache, for results that are expensive to compute and are asked for again and again, e.g. the shapes of ramps that are repeated throughout a scan (see `wigner_time.ramp_function`).
+
+The cache is bounded by the number of entries and, optionally, by the total size (in bytes) of the values. When either bound is exceeded, the least recently used entries are evicted. Hits, misses and evictions are counted, such that the usefulness of the cache can be checked with `info`.
+"""
+
+from collections import OrderedDict
+import sys
+import threading
+
+from munch import Munch
+
+###############################################################################
+#                   Utility functions                                         #
+###############################################################################
+
+
+def size(value) -> int:
+    """
+    The size of `value` in bytes. Arrays report the size of their data.
+    """
+    nbytes = getattr(value, "nbytes", None)
+    return int(nbytes) if nbytes is not None else sys.getsizeof(value)
+
+
+###############################################################################
+#                   Classes                                                   #
+###############################################################################
+
+
+class LRU:
+    """
+    A least-recently-used cache, holding at most `max_entries` entries and (where given) `max_bytes` bytes. See the module documentation.
+
+    Values that are mutable (e.g. arrays) are shared between the callers and so should be treated as read-only. The cache can be used from several threads (e.g. by `timeline.expand` with `workers`), where values that are missing may be computed more than once.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        """
+        The value for `key` (marked as the most recently used), or `default` if it isn't cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value):
+        """
+        Caches `value` under `key`, evicting the least recently used entries as necessary. Values that are larger than `max_bytes` on their own aren't cached.
+        """
+        nbytes = size(value)
+        if (self.max_bytes is not None) and (nbytes > self.max_bytes):
+            return value
+
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, nbytes)
+            self._bytes += nbytes
+            self._evict()
+        return value
+
+    def get_or_compute(self, key, f):
+        """
+        The value for `key`, where a value that isn't cached yet is computed (by calling `f()`) and cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry[0]
+            self.misses += 1
+        # Computed outside of the lock, such that other threads aren't held up
+        return self.put(key, f())
+
+    def _evict(self):
+        while self._entries and (
+            (len(self._entries) > self.max_entries)
+            or ((self.max_bytes is not None) and (self._bytes > self.max_bytes))
+        ):
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            self._bytes -= nbytes
+            self.evictions += 1
+
+    def resize(self, max_entries=None, max_bytes=None):
+        """
+        Changes the bounds of the cache (evicting entries as necessary). Bounds that aren't given are left as they are.
+        """
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self):
+        """
+        Empties the cache and resets the statistics.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def info(self) -> Munch:
+        """
+        The statistics of the cache: hits, misses, evictions, the hit rate, the number of entries and their size in bytes, along with the bounds.
+        """
+        num__lookups = self.hits + self.misses
+        return Munch(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            hit_rate=(self.hits / num__lookups) if num__lookups else 0.0,
+            entries=len(self._entries),
+            bytes=self._bytes,
+            max_entries=self.max_entries,
+            max_bytes=self.max_bytes,
+        )
+
+    def __repr__(self):
+        info = self.info()
+        return "LRU(entries={}/{}, bytes={}, hit_rate={:.2f})".format(
+            info.entries, info.max_entries, info.bytes, info.hit_rate
+        )
@@ -2,16 +2,59 @@
 This namespace is for abstracting out the implementation of dataframe manipulation.
 
 Particularly relevant for the pandas to polars upgrade.
+
+The heavier operations (e.g. `duplicated`, `drop_duplicates`, `join` and `replace_column__filtered`) can be handed to `polars` instead, by selecting the 'polars' backend with `set_backend` (see `wigner_time.internal.dataframe_polars`). Timelines are `pandas` dataframes either way and the results are the same.
 """
 
-# In the medium term, this should have a polars counterpart namespace so that we can switch between the two easily.
+import importlib.util
 
-from copy import deepcopy
+import numpy as np
 import pandas as pd
 
+from wigner_time import config as wt_config
+from wigner_time import util as wt_util
+from wigner_time.internal.builder import Builder
+
 
 CLASS = pd.DataFrame
 
+COLUMNS__LABELS = ["variable", "context"]
+"""Columns of labels that repeat many times (particularly in expanded timelines) and so are worth encoding as categoricals. See `encode`."""
+
+BACKENDS = ["pandas", "polars"]
+
+
+def set_backend(name):
+    """
+    Selects the library that does the heavy lifting: 'pandas' (the default) or 'polars' (multi-threaded, requires the `parallel_processing` extra).
+    """
+    if name not in BACKENDS:
+        raise ValueError(
+            "Unsupported dataframe backend '{}'. Choose from {}.".format(name, BACKENDS)
+        )
+    if (name == "polars") and not importlib.util.find_spec("polars"):
+        raise ImportError(
+            "The `polars` backend requires `polars` to be installed (see the `parallel_processing` extra)."
+        )
+    wt_config.DATAFRAME__BACKEND = name
+
+
+def backend():
+    return wt_config.DATAFRAME__BACKEND
+
+
+def _polars(df=None, columns=()):
+    """
+    The `polars` namespace, if the 'polars' backend is selected and it supports the given columns of `df`. `None` otherwise.
+    """
+    if wt_config.DATAFRAME__BACKEND != "polars":
+        return None
+    from wigner_time.internal import dataframe_polars
+
+    if (df is not None) and not dataframe_polars.is_supported(df, columns):
+        return None
+    return dataframe_polars
+
 
 def new(data, columns: list):
     return pd.DataFrame(data, columns=columns)
@@ -40,7 +83,80 @@ def new_schema(data, schema: dict):
     )
 
 
+def is_copy_on_write() -> bool:
+    """
+    Whether pandas' copy-on-write mode is active (always the case from pandas 3).
+    """
+    return (int(pd.__version__.split(".")[0]) >= 3) or (
+        pd.options.mode.copy_on_write is True
+    )
+
+
+def copy_on_write(is_enabled=True):
+    """
+    Switches pandas' copy-on-write mode on (or off), library-wide.
+
+    With copy-on-write, the copies that `wigner_time` makes to keep its functions non-mutating (see `copy`) are lazy: columns are only duplicated when they are actually changed. NOTE: This is a global pandas option, so it also affects code outside of `wigner_time`.
+    """
+    pd.set_option("mode.copy_on_write", is_enabled)
+
+
+def copy(df):
+    """
+    A copy of `df` that can be changed without affecting the original.
+
+    In copy-on-write mode (see `copy_on_write`), this is a shallow copy and the data is only duplicated when (and where) it is modified. Otherwise, all of the data is copied immediately.
+    """
+    return df.copy(deep=not is_copy_on_write())
+
+
+def encode(df, columns=COLUMNS__LABELS):
+    """
+    Converts the given (string) columns to categoricals, i.e. integer codes and a dictionary of labels. Masks, groupbys, joins and string methods then work on the handful of distinct labels rather than on every row.
+
+    NOTE: Public functions should return plain (object) columns. See `decode`.
+    """
+    return df.astype(
+        {
+            c: "category"
+            for c in columns
+            if (c in df.columns) and not isinstance(df[c].dtype, pd.CategoricalDtype)
+        }
+    )
+
+
+def decode(df, columns=COLUMNS__LABELS):
+    """
+    The reverse of `encode`.
+    """
+    return df.astype(
+        {
+            c: object
+            for c in columns
+            if (c in df.columns) and isinstance(df[c].dtype, pd.CategoricalDtype)
+        }
+    )
+
+
+def is_categorical(column) -> bool:
+    return isinstance(column.dtype, pd.CategoricalDtype)
+
+
+def groups(df, column="variable"):
+    """
+    The rows of `df` for every label of `column`, as a dictionary. This needs a single pass over the dataframe, rather than a mask (i.e. a pass) for every label.
+    """
+    return dict(list(df.groupby(column, sort=False, observed=True)))
+
+
 def join(df1, df2, label="variable"):
+    wt_polars = _polars(df1, [label])
+    if (
+        (wt_polars is not None)
+        and wt_polars.is_supported(df2, [label])
+        and not (set(df1.columns) & (set(df2.columns) - {label}))
+    ):
+        return wt_polars.join(df1, df2, label=label)
     return df1.join(
         df2.set_index(label),
         on=label,
@@ -48,9 +164,39 @@ def join(df1, df2, label="variable"):
 
 
 def concat(dfs, ignore_index=True):
+    """
+    When the first element is a `Builder`, the remaining frames are appended to it (and a `Builder` is returned) rather than copying everything into a new dataframe.
+    """
+    if is_builder(dfs[0]):
+        return dfs[0].append(*dfs[1:])
     return pd.concat(dfs, ignore_index=ignore_index)
 
 
+def is_builder(o) -> bool:
+    return isinstance(o, Builder)
+
+
+def is_timeline(o) -> bool:
+    """
+    Either a dataframe or a timeline that is still being built.
+    """
+    return isinstance(o, (CLASS, Builder))
+
+
+def builder(df):
+    """
+    Starts an append-only `Builder` from the given dataframe. See `wigner_time.internal.builder`.
+    """
+    return df if is_builder(df) else Builder(df)
+
+
+def materialize(o):
+    """
+    The dataframe corresponding to `o`, which may be a `Builder`.
+    """
+    return o.frame() if is_builder(o) else o
+
+
 def isnull(o):
     """
     Detect missing values for an array-like object.
@@ -73,7 +219,7 @@ def increment_selected_rows(
     Keywords are variable=<increment> pairs. If none are provided then the original df is returned.
     """
     if incs is not None:
-        dff = df if in_place else deepcopy(df)
+        dff = df if in_place else copy(df)
         for k, v in incs.items():
             dff.loc[dff[column__match] == k, column__increment] += v
         return dff
@@ -82,6 +228,9 @@ def increment_selected_rows(
 
 
 def drop_duplicates(df, subset=None, keep="last"):
+    wt_polars = _polars(df, df.columns if subset is None else subset)
+    if wt_polars is not None:
+        return wt_polars.drop_duplicates(df, subset=subset, keep=keep)
     return df.drop_duplicates(subset=subset, keep=keep, ignore_index=True).copy()
 
 
@@ -90,39 +239,59 @@ def insert_dataframes(df, indices, dfs):
     Inserts multiple DataFrames (`dfs`) into an existing DataFrame (`df`) at specified `indices`.
     """
     # TODO: Currently doesn't have tests
-    # Sort the insertions by index to ensure correct order of insertion
     if len(indices) != len(dfs):
         raise ValueError("`indices` and `dfs` are different lengths.")
-    insertions = zip(indices, dfs)
-    insertions = sorted(insertions, key=lambda x: x[0])
+    if not len(dfs):
+        return pd.concat([df], ignore_index=True)
 
-    # Track the cumulative offset caused by insertions
-    offset = 0
-    result_parts = []
-    current_start = 0
-
-    for index, new_df in insertions:
-        # Adjust index for previous insertions
-        adjusted_index = index + offset
-
-        # Add the portion of the original DataFrame up to the insertion point
-        result_parts.append(df.iloc[current_start:adjusted_index])
-
-        # Add the new DataFrame
-        result_parts.append(new_df)
+    return insert_rows(
+        df, indices, pd.concat(dfs, ignore_index=True), [len(d) for d in dfs]
+    )
 
-        # Update offset and the starting point for the next slice
-        offset += len(new_df)
-        current_start = adjusted_index
 
-    # Add the remainder of the original DataFrame
-    result_parts.append(df.iloc[current_start:])
+def insert_rows(df, indices, rows, sizes):
+    """
+    Like `insert_dataframes`, where the DataFrames to insert are given as consecutive blocks (of the given `sizes`) of `rows`. Rather than slicing and concatenating for every insertion, the order of all of the rows is worked out at once and the result is taken from a single concatenation.
 
-    # Concatenate all parts into a single DataFrame
-    return pd.concat(result_parts, ignore_index=True).reset_index(drop=True)
+    The insertion points are handled exactly as in `insert_dataframes`, i.e. the slices of `df` between insertions are offset by the number of rows inserted before them.
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    sizes = np.asarray(sizes, dtype=np.int64)
+    if len(indices) != len(sizes):
+        raise ValueError("`indices` and `sizes` are different lengths.")
+    if sizes.sum() != len(rows):
+        raise ValueError("`sizes` don't add up to the number of `rows`.")
+
+    num = len(df)
+    # The insertions are made in order of their index
+    order = np.argsort(indices, kind="stable")
+    indices__sorted = indices[order]
+    sizes__sorted = sizes[order]
+    # Adjusted for previous insertions
+    stops = indices__sorted + np.cumsum(sizes__sorted) - sizes__sorted
+    starts = np.concatenate([[0], stops])
+    stops = np.concatenate([stops, [np.iinfo(np.int64).max]])
+
+    # Interleave the slices of `df` with the inserted blocks (which follow `df` in the concatenation)
+    starts__df = np.minimum(starts, num)
+    sizes__df = np.maximum(np.minimum(stops, num) - starts__df, 0)
+    starts__rows = num + (np.cumsum(sizes) - sizes)[order]
+
+    segment__starts = np.empty(2 * len(order) + 1, dtype=np.int64)
+    segment__sizes = np.empty(2 * len(order) + 1, dtype=np.int64)
+    segment__starts[::2], segment__starts[1::2] = starts__df, starts__rows
+    segment__sizes[::2], segment__sizes[1::2] = sizes__df, sizes__sorted
+    positions = wt_util.ranges(segment__starts, segment__sizes)
+
+    return (
+        pd.concat([df, rows], ignore_index=True).take(positions).reset_index(drop=True)
+    )
 
 
 def duplicated(df, subset=["time", "variable"], keep="last"):
+    wt_polars = _polars(df, df.columns if subset is None else subset)
+    if wt_polars is not None:
+        return wt_polars.duplicated(df, subset=subset, keep=keep)
     return df.duplicated(subset=subset, keep=keep)
 
 
@@ -139,15 +308,25 @@ def replace_column__filtered(
     e.g. Replaces the `time` values with the numbers in {"ADwin_LowInit": -2, "ADwin_Init": -1, "ADwin_Finish": 2**31 - 1} according to which `context`s the rows are specified for.
     """
     if not is_in_place:
-        dff = deepcopy(df)
+        dff = copy(df)
     else:
         dff = df
 
-    dff[column__change] = (
-        dff[column__filter]
-        .map(dict__replacement)
-        .fillna(dff[column__change])
-        .astype(df[column__change].dtype)
+    wt_polars = _polars(df, [column__change, column__filter])
+    if (wt_polars is not None) and all(
+        isinstance(v, (int, float)) for v in dict__replacement.values()
+    ):
+        dff[column__change] = wt_polars.replace_column__filtered(
+            dff, dict__replacement, column__change, column__filter
+        )
+        return dff
+
+    replacements = dff[column__filter].map(dict__replacement)
+    if is_categorical(replacements):
+        # Mapping every category of a categorical gives another categorical
+        replacements = replacements.astype(object)
+    dff[column__change] = replacements.fillna(dff[column__change]).astype(
+        df[column__change].dtype
     )
 
     return dff
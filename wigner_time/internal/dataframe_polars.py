@@ -0,0 +1,129 @@
+"""
+The `polars` counterpart of `wigner_time.internal.dataframe`, which is used when the 'polars' backend is selected (see `wigner_time.internal.dataframe.set_backend`).
+
+Timelines remain `pandas` dataframes, as they can hold arbitrary python objects (e.g. the ramp `function`s). Only the columns that the operation depends on (e.g. the `subset` of `duplicated`) are handed to `polars`, where the work is planned lazily and executed on all cores. The result (a mask or a row order) is then applied to the original dataframe, such that the results are identical to the `pandas` backend.
+"""
+
+import importlib.util
+
+if not importlib.util.find_spec("polars"):
+    raise ImportError(
+        "The `polars` backend requires `polars` to be installed (see the `parallel_processing` extra)."
+    )
+
+import pandas as pd
+import polars as pl
+
+_ROW = "__row"
+
+###############################################################################
+#                   Utility functions                                         #
+###############################################################################
+
+
+def _is_supported__column(column) -> bool:
+    if column.dtype.kind in "biuf":
+        return True
+    return (column.dtype.kind == "O") and (
+        pd.api.types.infer_dtype(column, skipna=True) in ("string", "empty")
+    )
+
+
+def is_supported(df, columns) -> bool:
+    """
+    Whether the given columns can be handed to `polars` without changing their meaning, i.e. whether they are numbers or strings (rather than other python objects).
+    """
+    return all(_is_supported__column(df[c]) for c in columns)
+
+
+def _series(column):
+    values = column.to_numpy()
+    if values.dtype.kind == "O":
+        return pl.Series(column.name, values, dtype=pl.Utf8)
+    return pl.Series(column.name, values)
+
+
+def lazy(df, columns) -> pl.LazyFrame:
+    """
+    The given columns of `df` as a `polars.LazyFrame`, along with the position of every row.
+    """
+    return pl.LazyFrame([_series(df[c]) for c in columns]).with_row_index(_ROW)
+
+
+###############################################################################
+#                   Functions                                                 #
+###############################################################################
+
+
+def duplicated(df, subset, keep="last"):
+    """
+    See `wigner_time.internal.dataframe.duplicated`.
+    """
+    subset = list(df.columns if subset is None else subset)
+    row = pl.col(_ROW)
+    match keep:
+        case "last":
+            expr = row != row.max().over(subset)
+        case "first":
+            expr = row != row.min().over(subset)
+        case False:
+            expr = row.count().over(subset) > 1
+        case _:
+            raise ValueError("keep must be either 'first', 'last' or False")
+
+    mask = lazy(df, subset).select(expr.alias("duplicated")).collect()
+    return pd.Series(mask["duplicated"].to_numpy(), index=df.index)
+
+
+def drop_duplicates(df, subset=None, keep="last"):
+    """
+    See `wigner_time.internal.dataframe.drop_duplicates`.
+    """
+    return df[~duplicated(df, subset=subset, keep=keep).to_numpy()].reset_index(
+        drop=True
+    )
+
+
+def join(df1, df2, label="variable"):
+    """
+    See `wigner_time.internal.dataframe.join`. The matching of rows is done in `polars` and the columns of `df2` are then taken in `pandas`.
+    """
+    rows = (
+        lazy(df1, [label])
+        .rename({_ROW: "__left"})
+        .join(
+            lazy(df2, [label]).rename({_ROW: "__right"}),
+            on=label,
+            how="left",
+            join_nulls=True,
+            coalesce=True,
+        )
+        .sort("__left", maintain_order=True)
+        .select("__left", "__right")
+        .collect()
+    )
+    left = rows["__left"].to_numpy()
+    # Unmatched rows are missing, as for a `pandas` join
+    right = rows["__right"].fill_null(-1).to_numpy()
+
+    dff = df1.iloc[left]
+    columns = (
+        df2.drop(columns=label)
+        .reset_index(drop=True)
+        .reindex(right)
+        .set_index(dff.index)
+    )
+    return pd.concat([dff, columns], axis=1)
+
+
+def replace_column__filtered(df, dict__replacement, column__change, column__filter):
+    """
+    The new values of `column__change`. See `wigner_time.internal.dataframe.replace_column__filtered`.
+    """
+    replacements = (
+        _series(df[column__filter])
+        .replace(dict__replacement, default=None)
+        .cast(pl.Float64)
+    )
+    values = replacements.fill_null(pl.Series(df[column__change].to_numpy()))
+    return pd.Series(values.to_numpy(), index=df.index).astype(df[column__change].dtype)
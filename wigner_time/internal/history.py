@@ -0,0 +1,269 @@
+"""
+Indices over the rows of a timeline that is being built (see `wigner_time.internal.builder`), for answering 'what happened last?' without scanning the timeline.
+
+For every `variable` (and every `context`) the row numbers are kept sorted by time, along with a summary of the latest row and the ranges of times and values. Questions of the form 'the latest row for this variable, no later than `time__max`' are then answered by binary search.
+"""
+
+from bisect import bisect_right
+
+from munch import Munch
+import numpy as np
+import pandas as pd
+
+from wigner_time import config as wt_config
+
+###############################################################################
+#                   Constants                                                 #
+###############################################################################
+
+COLUMNS__INDEXED = ("variable", "context")
+"""The columns whose labels are indexed. The (pseudo-)label `None` indexes every row."""
+
+###############################################################################
+#                   Classes                                                   #
+###############################################################################
+
+
+class _Entry:
+    """
+    The rows for a single label, sorted by (time, row).
+    """
+
+    __slots__ = (
+        "times",
+        "rows",
+        "row__min",
+        "row__max",
+        "time__min",
+        "value__min",
+        "value__max",
+        "value__last",
+        "context__last",
+    )
+
+    def __init__(self):
+        self.times = []
+        self.rows = []
+        self.row__min = None
+        self.row__max = None
+        self.time__min = np.inf
+        self.value__min = np.inf
+        self.value__max = -np.inf
+        self.value__last = None
+        self.context__last = None
+
+    def extend(self, times, rows, values, contexts):
+        """
+        `times` must be sorted and `rows` must be increasing and larger than any existing row.
+        """
+        if (not self.times) or (times[0] >= self.times[-1]):
+            self.times.extend(times)
+            self.rows.extend(rows)
+            self.value__last = values[-1]
+            self.context__last = contexts[-1]
+        else:
+            for t, r, v, c in zip(times, rows, values, contexts):
+                if t >= self.times[-1]:
+                    self.value__last = v
+                    self.context__last = c
+                i = bisect_right(self.times, t)
+                self.times.insert(i, t)
+                self.rows.insert(i, r)
+
+        if self.row__min is None:
+            self.row__min = rows[0]
+        self.row__max = rows[-1]
+        self.time__min = min(self.time__min, times[0])
+        if len(values) and isinstance(values[0], (float, np.floating)):
+            self.value__min = min(self.value__min, np.min(values))
+            self.value__max = max(self.value__max, np.max(values))
+
+    def latest(self, time__max=None, size=None):
+        """
+        The (highest) row with the latest time, optionally no later than `time__max` and among the first `size` rows.
+        """
+        i = (
+            len(self.times)
+            if time__max is None
+            else bisect_right(self.times, time__max)
+        )
+        for j in range(i - 1, -1, -1):
+            if (size is None) or (self.rows[j] < size):
+                return self.rows[j]
+        return None
+
+
+class History:
+    """
+    See the module documentation.
+
+    Rows are identified by their position in the timeline. Queries accept a `size`, so that builders sharing the same buffers only see their own rows.
+    """
+
+    def __init__(self, columns=COLUMNS__INDEXED):
+        self.columns = tuple(columns)
+        self._entries = {column: {} for column in self.columns}
+        self._all = _Entry()
+
+    def add(self, columns: dict, row__start: int = 0, rows=None):
+        """
+        Indexes a chunk of rows, given as a dictionary of (equal-length) arrays that includes at least `time` and `variable`. The first row is at position `row__start` in the timeline, unless the (increasing) positions of every row are given by `rows`.
+        """
+        times = np.asarray(columns["time"], dtype=float)
+        num_rows = len(times)
+        if num_rows == 0:
+            return
+
+        if rows is None:
+            rows = np.arange(row__start, row__start + num_rows)
+        values = (
+            np.asarray(columns["value"])
+            if "value" in columns
+            else np.full(num_rows, np.nan)
+        )
+        contexts = (
+            np.asarray(columns["context"], dtype=object)
+            if "context" in columns
+            else np.full(num_rows, None, dtype=object)
+        )
+
+        order = np.lexsort((rows, times))
+        self._all.extend(
+            times[order].tolist(),
+            rows[order].tolist(),
+            values[order],
+            contexts[order],
+        )
+
+        for column in self.columns:
+            if column not in columns:
+                continue
+            codes, labels = pd.factorize(np.asarray(columns[column], dtype=object))
+            order = np.lexsort((rows, times, codes))
+            codes__sorted = codes[order]
+            bounds = np.searchsorted(codes__sorted, np.arange(len(labels) + 1))
+            entries = self._entries[column]
+            for k, label in enumerate(labels):
+                o = order[bounds[k] : bounds[k + 1]]
+                if label not in entries:
+                    entries[label] = _Entry()
+                entries[label].extend(
+                    times[o].tolist(), rows[o].tolist(), values[o], contexts[o]
+                )
+
+    def _entry(self, column, label):
+        if label is None:
+            return self._all
+        return self._entries[column].get(label)
+
+    def is_indexed(self, column) -> bool:
+        return column in self._entries
+
+    def contains(self, label, column="variable", size=None) -> bool:
+        entry = self._entry(column, label)
+        if entry is None or not entry.rows:
+            return False
+        return (size is None) or (entry.row__min < size)
+
+    def latest(self, label=None, column="variable", time__max=None, size=None):
+        """
+        The position of the latest row matching `label` in `column`, or `None`. See `wigner_time.internal.origin.previous`.
+        """
+        entry = self._entry(column, label)
+        if entry is None:
+            return None
+        return entry.latest(time__max=time__max, size=size)
+
+    def summary(self, label=None, column="variable", size=None):
+        """
+        The latest time, value and context, along with the ranges of times and values, for the given label. `None` if the label isn't known (or the summary doesn't apply to the first `size` rows).
+        """
+        entry = self._entry(column, label)
+        if (entry is None) or not entry.rows:
+            return None
+        if (size is not None) and (entry.row__max >= size):
+            return None
+        return Munch(
+            time__last=entry.times[-1],
+            value__last=entry.value__last,
+            context__last=entry.context__last,
+            time__min=entry.time__min,
+            time__max=entry.times[-1],
+            value__min=entry.value__min,
+            value__max=entry.value__max,
+        )
+
+
+class Anchors:
+    """
+    The table of anchors in a timeline: name, time, context and ordinal (the order in which each name first appeared).
+
+    Counting anchors, checking their availability and finding the last anchor (optionally within a context) don't depend on the number of rows in the timeline.
+    """
+
+    def __init__(self, label=wt_config.LABEL__ANCHOR):
+        self.label = label
+        self._history = History(columns=("context",))
+        self._rows = []
+        self._names = []
+        self._ordinals = {}
+        self._rows__first = []
+
+    def add(self, columns: dict, row__start: int = 0):
+        """
+        Indexes the anchors in a chunk of rows. See `History.add`.
+        """
+        variables = pd.Series(np.asarray(columns["variable"], dtype=object))
+        mask = variables.str.startswith(self.label, na=False).to_numpy(dtype=bool)
+        if not mask.any():
+            return
+
+        positions = np.flatnonzero(mask)
+        rows = positions + row__start
+        self._history.add(
+            {k: np.asarray(v)[positions] for k, v in columns.items()}, rows=rows
+        )
+        for row, name in zip(rows.tolist(), variables.to_numpy()[positions]):
+            self._rows.append(row)
+            self._names.append(name)
+            if name not in self._ordinals:
+                self._ordinals[name] = len(self._ordinals) + 1
+                self._rows__first.append(row)
+
+    def name(self, row):
+        return self._names[bisect_right(self._rows, row) - 1]
+
+    def count(self, size=None) -> int:
+        """
+        The number of distinct anchor names.
+        """
+        if size is None:
+            return len(self._rows__first)
+        return bisect_right(self._rows__first, size - 1)
+
+    def latest(self, context=None, time__max=None, size=None):
+        """
+        The position of the latest anchor row, optionally within `context` and no later than `time__max`. `None` if there is no such anchor.
+        """
+        if context is None:
+            return self._history.latest(time__max=time__max, size=size)
+        return self._history.latest(
+            context, column="context", time__max=time__max, size=size
+        )
+
+    def table(self, size=None, columns: dict | None = None):
+        """
+        The anchors as a dataframe, in the order that they appear in the timeline. `columns` supplies the `time` and `context` of every row in the timeline.
+        """
+        num = len(self._rows) if size is None else bisect_right(self._rows, size - 1)
+        rows = np.asarray(self._rows[:num], dtype=int)
+        names = self._names[:num]
+        return pd.DataFrame(
+            {
+                "variable": names,
+                "time": np.asarray(columns["time"])[rows],
+                "context": np.asarray(columns["context"], dtype=object)[rows],
+                "ordinal": [self._ordinals[n] for n in names],
+            },
+            index=rows,
+        )
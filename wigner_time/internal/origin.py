@@ -9,7 +9,6 @@ This is important for inferring what the user means when they want to add rows t
 # - Rename this file (and relevant functions) to something to do with query/history?
 # - dictionary option for origin (i.e. different origin for different variables?)
 
-from copy import deepcopy
 import numpy as np
 
 from wigner_time import config as wt_config
@@ -56,8 +55,22 @@ def previous(
 
     Anchors are a special case, where an exact match on the symbol is not required.
 
+    For timelines that are being built (see `wigner_time.internal.builder`), the row is found with the index of previous rows, rather than by scanning the timeline.
+
     Raises ValueError if the specified variable, or timeline, doesn't exist.
     """
+    if (
+        wt_frame.is_builder(timeline)
+        and (sort_by is None)
+        and timeline.is_indexed(column)
+    ):
+        row = timeline.latest(variable, column=column, time__max=time__max)
+        if (row is None) and (variable == wt_config.LABEL__ANCHOR):
+            row = timeline.anchor__latest(time__max=time__max)
+        if row is None:
+            raise ValueError("Previous {} not found".format(variable))
+        return row
+
     if time__max is not None:
         tline = timeline[timeline["time"] <= time__max]
     else:
@@ -146,19 +159,18 @@ def find(
     if o == [None, None]:
         return [None, None]
 
+    def _is_available(var, column):
+        if (timeline is None) or (var is None):
+            return None
+        if wt_frame.is_builder(timeline):
+            return timeline.contains(var, column=column)
+        return (timeline[column] == var).any()
+
     def _is_available__variable(var):
-        return (
-            (timeline["variable"] == var).any()
-            if (timeline is not None) and (var is not None)
-            else None
-        )
+        return _is_available(var, "variable")
 
     def _is_available__context(var):
-        return (
-            (timeline["context"] == var).any()
-            if (timeline is not None) and (var is not None)
-            else None
-        )
+        return _is_available(var, "context")
 
     def _previous_vt(
         timeline, get="time", col__fil="variable", var=None, time__max=None
@@ -224,6 +236,109 @@ def find(
     return tv
 
 
+def _latest_every(timeline, variables, time__max=None):
+    """
+    The time and value of the latest row for each of the `variables`, optionally no later than `time__max` (either a single time or a dictionary of times, keyed by variable), as a dictionary. Variables without such a row are left out.
+
+    Ties in time are resolved as in `previous`.
+    """
+    if not isinstance(time__max, dict):
+        time__max = {var: time__max for var in variables}
+
+    if wt_frame.is_builder(timeline):
+        rows = {
+            var: timeline.latest(var, time__max=time__max[var]) for var in variables
+        }
+        return {
+            var: [row["time"], row["value"]]
+            for var, row in rows.items()
+            if row is not None
+        }
+
+    mask = timeline["variable"].isin(variables)
+    bounds = {var: t for var, t in time__max.items() if t is not None}
+    if bounds:
+        # Variables without a bound are compared with infinity
+        mask &= timeline["time"] <= timeline["variable"].map(bounds).astype(
+            float
+        ).fillna(np.inf)
+    latest = (
+        timeline.loc[mask, ["time", "variable", "value"]]
+        .sort_values("time", kind="stable")
+        .drop_duplicates("variable", keep="last")
+    )
+    return {
+        var: [t, v]
+        for var, t, v in zip(
+            latest["variable"].to_numpy(),
+            latest["time"].to_numpy(),
+            latest["value"].to_numpy(),
+        )
+    }
+
+
+def find_every(timeline, variables, origin=None, time__max__relative=None):
+    """
+    Like `find`, but for many variables at once, where the placeholder `"variable"` in the `origin` stands for each of the `variables` in turn (see `update`). Returns a dictionary of time-value pairs, keyed by variable.
+
+    Origins without the placeholder are the same for every variable and so are only found once. Otherwise, the previous rows of all of the variables are found together, rather than searching the timeline for each variable separately. Anything that can't be resolved in this way (e.g. variables that aren't in the timeline) falls back to `find`, including its errors.
+
+    `time__max__relative` can be given for every variable separately, as a dictionary keyed by variable, such that the origin of one variable doesn't depend on the others (see `update`).
+    """
+    o = wt_util.ensure_pair(wt_util.ensure_iterable_with_None(origin))
+    variables = list(variables)
+    if not isinstance(time__max__relative, dict):
+        time__max__relative = {var: time__max__relative for var in variables}
+
+    def _find(var):
+        return find(
+            timeline,
+            origin=[var if e == "variable" else e for e in o],
+            time__max__relative=time__max__relative.get(var),
+        )
+
+    if "variable" not in o:
+        # The origin is shared and so is bounded by the earliest of the bounds
+        bounds = [t for t in time__max__relative.values() if t is not None]
+        tv = find(
+            timeline,
+            origin=o,
+            time__max__relative=min(bounds) if bounds else None,
+        )
+        return {var: tv for var in variables}
+
+    # Variable names that `find` would interpret differently
+    is_special = lambda var: (var in _ORIGINS) or (var == wt_config.LABEL__ANCHOR)
+    batch = [var for var in variables if not is_special(var)]
+
+    match o:
+        case ["variable", "variable"]:
+            found = _latest_every(timeline, batch)
+        case ["variable", None | float() as n]:
+            found = {
+                var: [t, n] for var, [t, _] in _latest_every(timeline, batch).items()
+            }
+        case [None | float() | str() as a, "variable"] if (a is not None):
+            batch = [var for var in batch if time__max__relative.get(var) is not None]
+            if isinstance(a, str):
+                t = find(timeline, origin=[a, None])[0]
+                t__max = t + wt_config.TIME_RESOLUTION
+            else:
+                t = a
+                t__max = t
+            time__max = {var: t__max + time__max__relative[var] for var in batch}
+            found = {
+                var: [t, v]
+                for var, [_, v] in _latest_every(
+                    timeline, batch, time__max=time__max
+                ).items()
+            }
+        case _:
+            found = {}
+
+    return {var: found[var] if var in found else _find(var) for var in variables}
+
+
 def update(
     timeline__present: wt_frame.CLASS,
     timeline__past: wt_frame.CLASS | None,
@@ -237,50 +352,33 @@ def update(
     if o == [None, None]:
         return timeline__present
 
-    timeline__future = deepcopy(timeline__present)
-
-    def _update_future(tlfuture, t0, v0, variable=None):
-        if variable is not None:
-            if t0 is not None:
-                wt_frame.increment_selected_rows(tlfuture, **{variable: t0})
-            if v0 is not None:
-                wt_frame.increment_selected_rows(
-                    tlfuture, column__increment="value", **{variable: v0}
-                )
-        else:
-            if t0 is not None:
-                tlfuture["time"] += t0
-            if v0 is not None:
-                tlfuture["value"] += v0
-        return tlfuture
-
-    def find_every_origin(timeline__past, timeline__future, input):
-        """
-        input is an origin, but where `variable` is a general placeholder: can be [var, None], [None, var], [var, var], [a,var], [var,a], [num,var], [var, num], where `var` is a specific variable reference.
-
-        Now allows for `timeline__future` to deal with values 'inside' `timeline__past`.
-        """
-
-        for var in timeline__future["variable"].unique():
-
-            _t0, _v0 = wt_origin.find(
-                timeline__past,
-                origin=[var if e == "variable" else e for e in input],
-                time__max__relative=timeline__future["time"].min(),
-            )
-            timeline__future = _update_future(
-                timeline__future,
-                _t0,
-                _v0,
-                variable=var,
-            )
+    timeline__future = wt_frame.copy(timeline__present)
 
     if timeline__past is not None:
-        find_every_origin(timeline__past, timeline__future, o)
+        origins = find_every(
+            timeline__past,
+            timeline__future["variable"].unique(),
+            origin=o,
+            # Every variable is bounded by its own earliest (unshifted) time
+            time__max__relative=timeline__future.groupby(
+                "variable", sort=False, observed=True
+            )["time"]
+            .min()
+            .to_dict(),
+        )
+        for column, k in [("time", 0), ("value", 1)]:
+            offsets = {var: tv[k] for var, tv in origins.items() if tv[k] is not None}
+            if offsets:
+                mask = timeline__future["variable"].isin(offsets.keys())
+                timeline__future.loc[mask, column] += timeline__future.loc[
+                    mask, "variable"
+                ].map(offsets)
 
     else:
         _t0, _v0 = wt_origin.find(origin=origin)
-
-        _update_future(timeline__future, _t0, _v0, variable=None)
+        if _t0 is not None:
+            timeline__future["time"] += _t0
+        if _v0 is not None:
+            timeline__future["value"] += _v0
 
     return timeline__future
@@ -0,0 +1,292 @@
+"""
+Lazy execution of chains of operations (see `timeline.stack(..., lazy=True)`).
+
+Rather than running each `update`, `ramp` etc. as soon as it is stacked, the operations are recorded in a `Plan`. When the plan is collected, it is first optimized:
+- consecutive `update`s that share their `context`, `origin` and `schema` are fused into a single batch of rows, which needs a single origin lookup and a single concatenation;
+- `expand` is deferred to the end of the plan, where this doesn't change the result.
+
+`Plan.explain` shows the optimized steps, for debugging.
+
+Both optimizations are only applied when they give the same timeline as the eager `stack`. This depends on the timeline and so is (re-)checked while the plan is executed, e.g. an `update` whose `origin` is the 'last' row depends on the rows of the previous `update` and so can't be fused with it.
+"""
+
+from munch import Munch
+import numpy as np
+
+from wigner_time import anchor as wt_anchor
+from wigner_time import config as wt_config
+from wigner_time import input as wt_input
+from wigner_time import timeline as tl
+from wigner_time import util as wt_util
+from wigner_time.internal import dataframe as wt_frame
+from wigner_time.internal import origin as wt_origin
+
+###############################################################################
+#                   Constants                                                 #
+###############################################################################
+
+_KEYS__UPDATE = ["t", "context", "origin", "schema"]
+"""The keyword arguments of `update` that aren't variables."""
+
+_KEYS__SHARED = ["context", "origin", "schema"]
+"""`update`s can only be fused when these keyword arguments are the same."""
+
+###############################################################################
+#                   Utility functions                                         #
+###############################################################################
+
+
+def _operation(f, kws):
+    """
+    Describes a stacked function, using the metadata of `wigner_time.util.Operation`s where available.
+    """
+    return Munch(
+        f=f,
+        # Functions (like `timeline.expand`) can also be stacked without being called
+        func=getattr(f, "func", f),
+        kwargs={**getattr(f, "kwargs", {}), **kws},
+        kws=kws,
+    )
+
+
+def _name(operation):
+    return getattr(operation.func, "__name__", type(operation.func).__name__)
+
+
+def _variables(operation):
+    return [k for k in operation.kwargs if k not in _KEYS__UPDATE]
+
+
+def _is_origin__independent(origin) -> bool:
+    """
+    Whether the origin can be found without reference to the latest rows of the timeline, i.e. it is made up of numbers, `None` and 'anchor' (anchors aren't changed by `expand` and `optimize` doesn't fuse anything after an `update` that adds an anchor, see `_is_anchor__added`).
+    """
+    o = wt_util.ensure_pair(wt_util.ensure_iterable_with_None(origin))
+    return all(
+        (e is None) or (e == "anchor") or isinstance(e, (int, float, np.number))
+        for e in o
+    )
+
+
+def _is_anchor__added(operation) -> bool:
+    """
+    Whether the `update` adds an anchor, i.e. sets a variable labelled as one (see `wigner_time.config.LABEL__ANCHOR`).
+    """
+    return any(
+        str(var).startswith(wt_config.LABEL__ANCHOR) for var in _variables(operation)
+    )
+
+
+def optimize(operations):
+    """
+    Groups the operations into steps: 'fused' (consecutive `update`s that might be fused), 'expand' or a single 'operation'.
+
+    An `update` that adds an anchor closes its step, as the 'anchor' origin of the `update`s after it depends on it.
+    """
+    steps = []
+    for operation in operations:
+        if (operation.func is tl.update) and hasattr(operation.f, "kwargs"):
+            previous = steps[-1] if steps else None
+            if (
+                (previous is not None)
+                and (previous.kind == "fused")
+                and not previous.is_closed
+                and all(
+                    previous.operations[0].kwargs.get(k) == operation.kwargs.get(k)
+                    for k in _KEYS__SHARED
+                )
+            ):
+                previous.operations.append(operation)
+                previous.is_closed = _is_anchor__added(operation)
+            else:
+                steps.append(
+                    Munch(
+                        kind="fused",
+                        operations=[operation],
+                        is_closed=_is_anchor__added(operation),
+                    )
+                )
+        elif operation.func is tl.expand:
+            steps.append(Munch(kind="expand", operations=[operation]))
+        else:
+            steps.append(Munch(kind="operation", operations=[operation]))
+    return steps
+
+
+###############################################################################
+#                   Execution                                                 #
+###############################################################################
+
+
+def _update__fused(timeline, operations):
+    """
+    Equivalent to applying the `update`s in turn (see `timeline.create`), but with all of the rows created, shifted according to the origin and concatenated at once.
+    """
+    kwargs = operations[0].kwargs
+    origin = wt_origin.auto(
+        timeline, kwargs["origin"], origin__defaults=wt_config.ORIGIN__DEFAULTS
+    )
+    if (len(operations) == 1) or not _is_origin__independent(origin):
+        for operation in operations:
+            timeline = operation.f(timeline, **operation.kws)
+        return timeline
+
+    chunks = []
+    for operation in operations:
+        arguments = dict(
+            time=operation.kwargs["t"],
+            context=operation.kwargs["context"],
+            **{k: operation.kwargs[k] for k in _variables(operation)},
+        )
+        columns = wt_input.columns_from_arguments(**arguments)
+        if columns is None:
+            rows = wt_input.rows_from_arguments(**arguments)
+            columns = {
+                k: np.array([row[i] for row in rows], dtype=object)
+                for i, k in enumerate(["time", "variable", "value", "context"])
+            }
+        chunks.append(columns)
+    sizes = [len(chunk["time"]) for chunk in chunks]
+    schema = kwargs["schema"]
+    df_rows = wt_frame.new(
+        {k: np.concatenate([chunk[k] for chunk in chunks]) for k in chunks[0]},
+        columns=schema.keys(),
+    ).astype(schema)
+    new = wt_origin.update(df_rows, timeline, origin=origin)
+    if kwargs["context"] is None:
+        _inherit_context(new, timeline, sizes)
+    return wt_frame.concat([timeline, new])
+
+
+def _inherit_context(new, timeline, sizes):
+    """
+    Like `timeline.inherit_context`, for the rows of consecutive `update`s (of the given `sizes`), where each `update` inherits from the timeline including the rows of the ones before it.
+    """
+    row = wt_origin.previous(timeline)
+    time__latest, context__latest = row["time"], row["context"]
+
+    mask = tl._mask__no_context(new).to_numpy()
+    times = new["time"].to_numpy()
+    contexts = new["context"].to_numpy(copy=True)
+    start = 0
+    for size in sizes:
+        stop = start + size
+        contexts[start:stop][mask[start:stop]] = context__latest
+        if size:
+            time__max = times[start:stop].max()
+            if time__max >= time__latest:
+                # The latest of equal times is the last one
+                i = start + np.flatnonzero(times[start:stop] == time__max)[-1]
+                time__latest, context__latest = time__max, contexts[i]
+        start = stop
+    new["context"] = contexts
+
+
+def _is_deferrable(timeline, steps) -> bool:
+    """
+    Whether an `expand` can be moved past the given (later) steps without changing the result: they may only add `update`s and `anchor`s with an explicit `context` (rather than one inherited from the latest row) and origins that don't refer to the latest rows.
+    """
+    is_anchored = wt_anchor.is_available(timeline)
+    for step in steps:
+        for operation in step.operations:
+            if operation.func not in (tl.update, tl.anchor):
+                return False
+            if operation.kwargs.get("context") is None:
+                return False
+            origin = operation.kwargs.get("origin")
+            if origin is None:
+                # `anchor`s are always available after the first one
+                if not is_anchored:
+                    return False
+            elif not _is_origin__independent(origin):
+                return False
+            is_anchored = is_anchored or (operation.func is tl.anchor)
+    return True
+
+
+def execute(timeline, steps):
+    deferred = []
+    for i, step in enumerate(steps):
+        match step.kind:
+            case "fused":
+                timeline = _update__fused(timeline, step.operations)
+            case "expand" if _is_deferrable(timeline, steps[i + 1 :]):
+                deferred.append(step.operations[0])
+            case _:
+                operation = step.operations[0]
+                timeline = operation.f(timeline, **operation.kws)
+
+    for operation in deferred:
+        timeline = operation.f(timeline, **operation.kws)
+    return timeline
+
+
+###############################################################################
+#                   Classes                                                   #
+###############################################################################
+
+
+class Plan:
+    """
+    A chain of operations that hasn't been run yet. See the module documentation.
+
+    Collect the plan with `collect` or, like the functional returned by `stack`, call it on a timeline.
+    """
+
+    def __init__(self, timeline, fs, kws=None):
+        self.timeline = timeline
+        self.fs = list(fs)
+        self.kws = kws or {}
+        self.operations = [_operation(f, self.kws) for f in self.fs]
+
+    def steps(self):
+        return optimize(self.operations)
+
+    def explain(self) -> str:
+        """
+        A description of the optimized steps of the plan.
+        """
+        steps = self.steps()
+        lines = [
+            "Plan: {} operations in {} steps".format(len(self.operations), len(steps))
+        ]
+        for i, step in enumerate(steps):
+            names = [_name(o) for o in step.operations]
+            match step.kind:
+                case "fused" if len(names) > 1:
+                    description = "update x{} [fused] ({})".format(
+                        len(names),
+                        ", ".join(
+                            dict.fromkeys(
+                                v for o in step.operations for v in _variables(o)
+                            )
+                        ),
+                    )
+                case "fused":
+                    description = "update ({})".format(
+                        ", ".join(_variables(step.operations[0]))
+                    )
+                case "expand":
+                    description = "expand [deferred, where possible]"
+                case _:
+                    description = names[0]
+            lines.append("  {:>3}: {}".format(i, description))
+        return "\n".join(lines)
+
+    def collect(self, timeline=None):
+        """
+        Runs the optimized plan on the given timeline, or the timeline that the plan was stacked on.
+        """
+        if timeline is None:
+            timeline = self.timeline
+        if timeline is None:
+            raise ValueError("The plan needs a timeline to be collected.")
+        return tl._buffered(lambda x: execute(x, self.steps()))(timeline)
+
+    def __call__(self, timeline, **kws):
+        if kws:
+            return Plan(self.timeline, self.fs, {**self.kws, **kws}).collect(timeline)
+        return self.collect(timeline)
+
+    def __repr__(self):
+        return self.explain()
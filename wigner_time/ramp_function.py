@@ -1,11 +1,32 @@
 # Copyright Thomas W. Clark & András Vukics 2024. Distributed under the Boost Software License, Version 1.0. (See accompanying file LICENSE.txt)
 
+"""
+Functions for filling in the points of a ramp, given its (origin, terminus) pair of [time, value]s.
+
+Ramp functions take a single pair and return an (N, 2) array of [time, value]s. When a timeline is expanded, there are often hundreds of ramps and so the functions can also be given in a batched form (see `batched`), which takes arrays of the starting and ending times and values (`t1`, `v1`, `t2`, `v2`) and returns all of the points at once, in a compressed sparse row (CSR) layout:
+`times, values, offsets`
+where the points of ramp `i` are `times[offsets[i]:offsets[i+1]]` etc.
+"""
+
+import functools
+
 import numpy as np
+from wigner_time import config as wt_config
 from wigner_time import util as wt_util
+from wigner_time.internal import cache as wt_cache
 
 TIME_RESOLUTION = 1e-6
 # default meaningful gap between specified times
 
+SHAPES = wt_cache.LRU(max_entries=wt_config.CACHE__SHAPES__MAX_ENTRIES)
+"""Normalized ramp shapes, which only depend on the number of points and the shape parameters (see `shape__tanh`). Check `SHAPES.info()` for the hit rate."""
+
+EXPANSIONS = wt_cache.LRU(
+    max_entries=wt_config.CACHE__EXPANSIONS__MAX_ENTRIES,
+    max_bytes=wt_config.CACHE__EXPANSIONS__MAX_BYTES,
+)
+"""The samples of expanded ramps, as (2, N) arrays of times and values, for `timeline.expand(..., cache=True)`."""
+
 
 def linear(origin, terminus, time_resolution=TIME_RESOLUTION):
     """
@@ -19,30 +40,244 @@ def linear(origin, terminus, time_resolution=TIME_RESOLUTION):
     return np.array([times, m * (times - t1) + v1]).transpose()
 
 
+def _nonlinear(i, f, factor):
+    """
+    factor should be in [-0.5,+0.5].
+    """
+    # TODO: Better name
+
+    return factor * (f - i) + (f + i) / 2.0
+
+
+def _tanhFactor(cc: np.ndarray, ti=3):
+    """ """
+    # TODO: ti should be described
+    return np.tanh(ti * (2.0 * (cc - cc[0]) / (cc[-1] - cc[0]) - 1.0)) / (
+        2.0 * np.tanh(ti)
+    )
+
+
+def shape__tanh(num, ti=3):
+    """
+    The normalized shape of a `tanh` ramp of `num` points, i.e. the factor (in [-0.5, +0.5]) over an evenly spaced unit interval. Ramps with the same number of points (and `ti`) only differ by an affine scale and offset and so the shape is cached in `SHAPES`.
+
+    The returned array is shared and so shouldn't be modified.
+    """
+
+    def compute():
+        shape = _tanhFactor(np.linspace(0.0, 1.0, num), ti)
+        shape.setflags(write=False)
+        return shape
+
+    return SHAPES.get_or_compute(("tanh", num, ti), compute)
+
+
 def tanh(origin, terminus, time_resolution=TIME_RESOLUTION, ti=3):
     """
     Hyperbolic tan, with a call signature adapted for practical timeline population.
 
     origin/terminus are time-value pairs
     """
+    t1, v1 = origin
+    t2, v2 = terminus
+    cc = wt_util.range__inclusive(t1, t2, time_resolution)
+
+    return np.array([cc, _nonlinear(v1, v2, shape__tanh(len(cc), ti))]).transpose()
+
+
+###############################################################################
+#                   Batched functions                                         #
+###############################################################################
+
+
+def _layout(num):
+    """
+    The CSR layout for ramps of `num` points each: the offsets of the ramps, the ramp that each point belongs to and the index of each point within its ramp.
+    """
+    offsets = np.concatenate([[0], np.cumsum(num)]).astype(np.int64)
+    ramp = np.repeat(np.arange(len(num)), num)
+    return offsets, ramp, np.arange(offsets[-1]) - offsets[ramp]
+
+
+def linear__batched(t1, v1, t2, v2, time_resolution=TIME_RESOLUTION):
+    """
+    The batched form of `linear`, giving identical points.
+    """
+    t1, v1, t2, v2 = (np.asarray(a, dtype=float) for a in (t1, v1, t2, v2))
+
+    # As `np.arange`, where the points (apart from the first two) are filled in from the difference of the first two
+    num = np.maximum(np.ceil((t2 - t1) / time_resolution), 0).astype(np.int64)
+    offsets, ramp, i = _layout(num)
+    t1__next = t1 + time_resolution
+    times = t1[ramp] + i * (t1__next - t1)[ramp]
+    times[i == 1] = t1__next[ramp[i == 1]]
+    times[i == 0] = t1[ramp[i == 0]]
+
+    m = (v2 - v1) / (t2 - t1)
+    return times, m[ramp] * (times - t1[ramp]) + v1[ramp], offsets
+
+
+def tanh__batched(t1, v1, t2, v2, time_resolution=TIME_RESOLUTION, ti=3):
+    """
+    The batched form of `tanh`, giving identical points.
+    """
+    t1, v1, t2, v2 = (np.asarray(a, dtype=float) for a in (t1, v1, t2, v2))
+
+    # As `wigner_time.util.range__inclusive`, i.e. `np.linspace`
+    num = np.abs(np.ceil((t2 - t1) / time_resolution) + 1).astype(np.int64)
+    offsets, ramp, i = _layout(num)
+    i = i.astype(float)
+    div = num - 1
+    delta = t2 - t1
+    step = np.where(div > 0, delta / np.maximum(div, 1), delta)
+    cc = i * step[ramp] + t1[ramp]
+    # Steps that underflow are handled separately (as in `np.linspace`)
+    is_underflow = ((div > 0) & (step == 0))[ramp]
+    if is_underflow.any():
+        cc[is_underflow] = (i / np.maximum(div, 1)[ramp] * delta[ramp] + t1[ramp])[
+            is_underflow
+        ]
+    is_endpoint = num > 1
+    cc[offsets[1:][is_endpoint] - 1] = t2[is_endpoint]
+
+    # The ramps with the same number of points share their shape
+    factor = np.empty(len(cc))
+    for n in np.unique(num[num > 0]):
+        shape = shape__tanh(int(n), ti)
+        ramps = np.flatnonzero(num == n)
+        if len(ramps) == len(num):
+            factor = np.tile(shape, len(ramps))
+        else:
+            factor[wt_util.ranges(offsets[ramps], np.full(len(ramps), n))] = np.tile(
+                shape, len(ramps)
+            )
+    return cc, _nonlinear(v1[ramp], v2[ramp], factor), offsets
+
+
+def knots(times, values, offsets, tolerance):
+    """
+    The points of the ramps (in the CSR layout, see the module documentation) to keep, as a mask, such that the linear interpolation between them stays within `tolerance` (a number or one per ramp) of the points that are left out. The first and last points of every ramp are always kept and ramps with a tolerance of NaN are kept whole.
 
-    def nonlinear(i, f, factor):
-        """
-        factor should be in [-0.5,+0.5].
-        """
-        # TODO: Better name
+    The knots are chosen by repeatedly splitting, at the point of the largest error, the segments whose error is too large (i.e. the Ramer-Douglas-Peucker algorithm, with the error measured in value), for all of the ramps at once.
+    """
+    times = np.asarray(times, dtype=float)
+    values = np.asarray(values, dtype=float)
+    sizes = np.diff(offsets)
+    tolerance = np.broadcast_to(np.asarray(tolerance, dtype=float), sizes.shape)
+
+    is_whole = np.isnan(tolerance)
+    is_knot = np.zeros(len(times), dtype=bool)
+    is_knot[offsets[:-1][sizes > 0]] = True
+    is_knot[offsets[1:][sizes > 0] - 1] = True
+    is_knot[wt_util.ranges(offsets[:-1][is_whole], sizes[is_whole])] = True
 
-        return factor * (f - i) + (f + i) / 2.0
+    # Segments between knots (inclusive) that have points in between, along with their tolerance
+    is_segment = (sizes > 2) & ~is_whole
+    starts = offsets[:-1][is_segment]
+    stops = offsets[1:][is_segment] - 1
+    tolerances = tolerance[is_segment]
+    while len(starts):
+        num = stops - starts - 1
+        segment = np.repeat(np.arange(len(starts)), num)
+        points = wt_util.ranges(starts + 1, num)
 
-    def tanhFactor(cc: np.ndarray, ti=3):
-        """ """
-        # TODO: ti should be described
-        return np.tanh(ti * (2.0 * (cc - cc[0]) / (cc[-1] - cc[0]) - 1.0)) / (
-            2.0 * np.tanh(ti)
+        t1, v1 = times[starts][segment], values[starts][segment]
+        t2, v2 = times[stops][segment], values[stops][segment]
+        errors = np.abs(
+            values[points] - (v1 + (v2 - v1) * (times[points] - t1) / (t2 - t1))
         )
 
-    t1, v1 = origin
-    t2, v2 = terminus
-    cc = wt_util.range__inclusive(t1, t2, time_resolution)
+        # The (first) point of the largest error in each segment
+        error__max = np.maximum.reduceat(errors, np.cumsum(num) - num)
+        is_max = errors == error__max[segment]
+        segments__max, first = np.unique(segment[is_max], return_index=True)
+        split = np.full(len(starts), -1)
+        split[segments__max] = points[is_max][first]
+
+        is_split = error__max > tolerances
+        split = split[is_split]
+        is_knot[split] = True
+        starts, stops, tolerances = (
+            np.concatenate([starts[is_split], split]),
+            np.concatenate([split, stops[is_split]]),
+            np.concatenate([tolerances[is_split]] * 2),
+        )
+        is_segment = stops - starts > 1
+        starts, stops, tolerances = (
+            starts[is_segment],
+            stops[is_segment],
+            tolerances[is_segment],
+        )
+
+    return is_knot
 
-    return np.array([cc, nonlinear(v1, v2, tanhFactor(cc, ti))]).transpose()
+
+def knots__held(times, values, offsets, tolerance):
+    """
+    Like `knots`, but for a device that holds its output until the next point (e.g. ADwin), rather than interpolating: a point is only kept where its value differs from that of the last point kept by more than `tolerance` (a number or one per ramp), such that the held output stays within `tolerance` of the ramp. The first and last points of every ramp are always kept and ramps with a tolerance of NaN are kept whole.
+
+    The next point to keep is searched for in a window after the last one, which is widened until it is found, and so this takes a step for every point that is kept, rather than for every point.
+    """
+    values = np.asarray(values, dtype=float)
+    sizes = np.diff(offsets)
+    tolerance = np.broadcast_to(np.asarray(tolerance, dtype=float), sizes.shape)
+
+    is_knot = np.zeros(len(values), dtype=bool)
+    is_knot[offsets[:-1][sizes > 0]] = True
+    is_knot[offsets[1:][sizes > 0] - 1] = True
+    is_whole = np.isnan(tolerance)
+    is_knot[wt_util.ranges(offsets[:-1][is_whole], sizes[is_whole])] = True
+
+    for start, stop, tol in zip(
+        offsets[:-1][~is_whole], offsets[1:][~is_whole], tolerance[~is_whole]
+    ):
+        k, window = start, 16
+        while k < stop - 1:
+            exceeds = np.flatnonzero(
+                np.abs(values[k + 1 : min(k + 1 + window, stop)] - values[k]) > tol
+            )
+            if len(exceeds):
+                window = max(16, 2 * (exceeds[0] + 1))
+                k += exceeds[0] + 1
+                is_knot[k] = True
+            elif k + 1 + window >= stop:
+                break
+            else:
+                window *= 2
+
+    return is_knot
+
+
+linear.batched = linear__batched
+tanh.batched = tanh__batched
+
+
+def _batched(f, t1, v1, t2, v2, **kws):
+    """
+    Calls the single-pair ramp function `f` for every ramp, in the batched form.
+    """
+    times, values, sizes = [], [], []
+    for origin, terminus in zip(np.column_stack([t1, v1]), np.column_stack([t2, v2])):
+        tv = np.asarray(f(origin, terminus, **kws))
+        tv = tv.reshape(-1, tv.shape[-1]) if tv.size else np.empty((0, 2))
+        times.append(tv[:, 0].astype(float))
+        values.append(tv[:, 1].astype(float))
+        sizes.append(len(tv))
+    return (
+        np.concatenate(times + [[]]),
+        np.concatenate(values + [[]]),
+        np.concatenate([[0], np.cumsum(sizes, dtype=np.int64)]).astype(np.int64),
+    )
+
+
+def batched(f):
+    """
+    The batched form of the ramp function `f` (see the module documentation).
+
+    This is `f.batched`, where it is defined (e.g. for `linear` and `tanh`), such that user-defined ramp functions can also provide a native batched form. Otherwise, `f` is called for every ramp.
+    """
+    if hasattr(f, "batched"):
+        return f.batched
+    if isinstance(f, functools.partial) and not f.args and hasattr(f.func, "batched"):
+        return functools.partial(f.func.batched, **f.keywords)
+    return functools.partial(_batched, f)
@@ -9,8 +9,9 @@ Multiple layers of abstraction:
 It is a goal to be able to go up and down through the layers of abstraction.
 """
 
-from copy import deepcopy
+import concurrent.futures
 import inspect
+import os
 from typing import Callable
 
 import funcy
@@ -22,6 +23,7 @@ from wigner_time import input as wt_input
 from wigner_time import ramp_function as wt_ramp_function
 from wigner_time.internal import dataframe as wt_frame
 from wigner_time.internal import origin as wt_origin
+from wigner_time.internal import plan as wt_plan
 from wigner_time import util as wt_util
 import pandas as pd
 
@@ -89,7 +91,7 @@ def inherit_context(
     if is_inPlace:
         df = timeline
     else:
-        df = deepcopy(timeline)
+        df = wt_frame.copy(timeline)
 
     if (timeline__previous is not None) and (context is None):
         if time__max == "min":
@@ -150,9 +152,15 @@ def create(
 
     NOTE: It seems to be the case that dataframes use less memory than lists of dictionaries or dictionaries of lists (in general).
     """
-    rows = wt_input.rows_from_arguments(*vtvc, time=t, context=context, **vtvc_dict)
-
-    df_rows = wt_frame.new(rows, columns=schema.keys()).astype(schema)
+    columns = wt_input.columns_from_arguments(
+        *vtvc, time=t, context=context, **vtvc_dict
+    )
+    if columns is not None:
+        # Arrays of [time, value] pairs don't need to be split into rows
+        df_rows = wt_frame.new(columns, columns=schema.keys()).astype(schema)
+    else:
+        rows = wt_input.rows_from_arguments(*vtvc, time=t, context=context, **vtvc_dict)
+        df_rows = wt_frame.new(rows, columns=schema.keys()).astype(schema)
     new = wt_origin.update(df_rows, timeline, origin=origin)
 
     if timeline is not None:
@@ -183,7 +191,7 @@ def update(
     WARNING: In this case, beware of accidentally putting timelines into special contexts.
     """
     if timeline is None:
-        return wt_util.function__lambda()
+        return wt_util.operation(update, locals())
 
     else:
         # Check if anchor is desired and available
@@ -222,9 +230,9 @@ def anchor(
     # - looks like it will fail?
 
     if timeline is None:
-        return wt_util.function__lambda()
+        return wt_util.operation(anchor, locals())
 
-    num_anchors = timeline["variable"].loc[wt_anchor.mask(timeline)].nunique()
+    num_anchors = wt_anchor.count(timeline)
 
     origin = wt_origin.auto(
         timeline, origin, origin__defaults=wt_config.ORIGIN__DEFAULTS
@@ -284,10 +292,14 @@ def ramp(
     `lockbox_MOT__V=[[0.05, 0.0], [0.05, 5]]`,
     but with the condition that the lists are not inhomogenous.
 
+    More than two [time, value] pairs define a ramp with several knots, e.g.
+    `lockbox_MOT__V=[[0.0, 0.0], [0.05, 5], [0.1, 2]]`,
+    where, like the ending point, the later knots are relative to the starting point (see `origin2`). The ramp is stored as a single group of rows (with a 'num__bounds' column) and its pieces are expanded all at once (see `expand`), which is cheaper than chaining a `ramp` for every piece.
+
     NOTE: `duration` is a human-readable convenience for normal API usage. This is because the temporal origin of the second point is almost always in reference to the first point. Where there is a conflict, `t2` will have supremacy.
     """
     if timeline is None:
-        return wt_util.function__lambda()
+        return wt_util.operation(ramp, locals())
 
     _vtvcs = {k: np.array(v) for k, v in vtvc_dict.items()}
     max_ndim = np.array([a.ndim for a in _vtvcs.values()]).flatten().max()
@@ -295,6 +307,7 @@ def ramp(
     if t2 is None and duration is not None:
         t2 = duration
 
+    rows__knots = []
     match max_ndim:
         case 0 | 1:
             rows1 = None
@@ -313,6 +326,15 @@ def ramp(
             rows2 = wt_input.rows_from_arguments(
                 *[], time=t2, context=context, **(_vtvc_1d | _vtvc_2d_1)
             )
+            # Any further knots (see `expand`)
+            num__bounds = {k: len(v) for k, v in _vtvcs.items() if v.ndim == 2}
+            for i in range(2, max(num__bounds.values())):
+                rows__knots += wt_input.rows_from_arguments(
+                    *[],
+                    time=t2,
+                    context=context,
+                    **{k: v[i] for k, v in _vtvcs.items() if num__bounds.get(k, 0) > i},
+                )
 
         case _:
             raise ValueError(
@@ -360,10 +382,110 @@ def ramp(
     if new1_clean.empty or new2_clean.empty:
         return timeline
 
+    if rows__knots:
+        # Like the ending points, relative to the starting points
+        new__knots = wt_origin.update(
+            wt_frame.new(rows__knots, columns=schema.keys()).astype(schema),
+            new1,
+            origin=origin2,
+        )
+        new__knots["function"] = function
+        new__knots["context"] = new__knots["variable"].map(
+            dict(zip(new1["variable"], new1["context"]))
+        )
+        new1, new2, new__knots = (
+            df.assign(num__bounds=df["variable"].map(num__bounds).fillna(2))
+            for df in (new1, new2, new__knots)
+        )
+        return wt_frame.concat([timeline, new1, new2, new__knots])
+
     # NOTE: Don't drop duplicates until after the expansion. Currently, this messes things up.
     return wt_frame.concat([timeline, new1, new2])
 
 
+def ramps(
+    segments=None,
+    timeline=None,
+    context=None,
+    origin=None,
+    origin2=["variable"],
+    schema=_SCHEMA,
+    function=wt_ramp_function.tanh,
+) -> wt_frame.CLASS | Callable:
+    """
+    Many `ramp`s at once, from a table of `segments` (a dataframe or a dictionary of columns) with the columns:
+    - 'variable', 'time__end' and 'value__end' (required);
+    - 'time__start' and 'value__start' (where missing, or NaN, the segment starts from the origin, as in `ramp`);
+    - 'function' and 'context' (where missing, or NaN/None, the `function` and `context` keyword arguments are used).
+
+    Generated sequences (e.g. ladders of coil ramps built in a loop) can then be added in one go, rather than paying for the origin lookups and concatenations of a `ramp` for every segment. The segments are treated as if they were given to a single `ramp` call: the origins of the starting points are found once, in `timeline` (i.e. not in the earlier segments of the table), and the ending points are relative to the starting point of their own segment, according to `origin2` (which supports 'variable', numbers and `None`). Segments whose ends coincide in time or in value are dropped.
+
+    e.g.
+    `tl.ramps(dict(variable=["coil__A"] * 3, time__start=[0.0, 1.0, 2.0], value__start=[0.0, 1.0, 2.0], time__end=1.0, value__end=[1.0, 2.0, 3.0]), origin=["anchor", None])`
+    """
+    if timeline is None:
+        return wt_util.operation(ramps, locals(), kwargs=[])
+
+    df = pd.DataFrame(segments)
+    if missing := {"variable", "time__end", "value__end"} - set(df.columns):
+        raise ValueError(
+            "The segments of `ramps` are missing the columns {}.".format(
+                sorted(missing)
+            )
+        )
+    df = df.reset_index(drop=True)
+
+    def column(c, default):
+        if c not in df.columns:
+            return pd.Series([default] * len(df), dtype=object)
+        # NOTE: Not `where`, which would call the default if it is a function
+        values = df[c].to_numpy(dtype=object, copy=True)
+        values[pd.isna(df[c]).to_numpy()] = default
+        return pd.Series(values)
+
+    df_1 = wt_frame.new(
+        {
+            "time": column("time__start", 0.0),
+            "variable": df["variable"],
+            "value": column("value__start", 0.0),
+            "context": column("context", "" if context is None else context),
+        },
+        columns=schema.keys(),
+    ).astype(schema)
+    functions = column("function", function)
+
+    origin = wt_origin.auto(timeline, origin, origin__defaults=[["anchor", "variable"]])
+    new1 = wt_origin.update(df_1, timeline, origin=origin)
+    inherit_context(new1, timeline)
+    new1["function"] = functions
+
+    # The ending points, relative to the starting point of the same segment
+    new2 = new1.assign(
+        time=df["time__end"].to_numpy(dtype=float),
+        value=df["value__end"].to_numpy(dtype=float),
+    )
+    for c, o in zip(["time", "value"], wt_util.ensure_pair(list(origin2))):
+        if o == "variable":
+            new2[c] += new1[c]
+        elif isinstance(o, (int, float)):
+            new2[c] += o
+        elif o is not None:
+            raise wt_origin.error__unsupported_option(origin2)
+
+    TOL = 1e-15
+    mask = (np.abs(new1["time"] - new2["time"]) >= TOL) & (
+        np.abs(new1["value"] - new2["value"]) >= TOL
+    )
+    if not mask.any():
+        return timeline
+
+    # Each starting point is followed by its ending point, such that segments that meet are paired up correctly by `expand`
+    new = wt_frame.concat([new1[mask], new2[mask]])
+    num = int(mask.sum())
+    new = new.take(np.arange(2 * num).reshape(2, num).T.flatten())
+    return wt_frame.concat([timeline, new.reset_index(drop=True)])
+
+
 # def stack(firstArgument, *fs: list[Callable]) -> Callable | wt_frame.CLASS:
 #     if isinstance(firstArgument, wt_frame.CLASS):
 #         return funcy.compose(*fs[::-1])(firstArgument)
@@ -371,9 +493,27 @@ def ramp(
 #         return funcy.compose(*fs[::-1], firstArgument)
 
 
+def _buffered(f: Callable) -> Callable:
+    """
+    Runs `f` on an append-only builder (see `wigner_time.internal.builder`), so that each operation in a chain only copies its own rows. The dataframe is produced once, at the end.
+
+    Timelines that are already being built are passed straight through, i.e. nested `stack`s share the same builder.
+    """
+
+    def f__buffered(timeline):
+        if wt_config.STACK__BUILDER and isinstance(timeline, wt_frame.CLASS):
+            return wt_frame.materialize(f(wt_frame.builder(timeline)))
+        return f(timeline)
+
+    return f__buffered
+
+
 def stack(
-    timeline_or_f: wt_frame.CLASS | Callable, *fs: list[Callable], **kws
-) -> Callable | wt_frame.CLASS:
+    timeline_or_f: wt_frame.CLASS | Callable,
+    *fs: list[Callable],
+    lazy=False,
+    **kws,
+) -> Callable | wt_frame.CLASS | wt_plan.Plan:
     """
     For chaining modifications to the timeline in a composable way.
 
@@ -398,81 +538,325 @@ def stack(
 
         context='MOT'
     )`
+
+    With `lazy=True`, nothing is run straight away. Instead, a `Plan` of the operations is returned, which can be inspected (`plan.explain()`) and is optimized when it is run (`plan.collect()` or, for functionals, `plan(timeline)`). See `wigner_time.internal.plan`.
     """
+    if lazy:
+        if wt_frame.is_timeline(timeline_or_f):
+            return wt_plan.Plan(timeline_or_f, fs, kws)
+        elif callable(timeline_or_f):
+            return wt_plan.Plan(None, [timeline_or_f, *fs], kws)
 
     fs__wrapped = [lambda x, f=f: f(x, **kws) for f in fs]
     composed = funcy.compose(*reversed(fs__wrapped))
 
-    if isinstance(timeline_or_f, wt_frame.CLASS):
-        return composed(timeline_or_f)
+    if wt_frame.is_timeline(timeline_or_f):
+        return _buffered(composed)(timeline_or_f)
     elif callable(timeline_or_f):
         wrapped_first = lambda x: timeline_or_f(x, **kws)
-        return funcy.compose(*reversed(fs__wrapped), wrapped_first)
+        return _buffered(funcy.compose(*reversed(fs__wrapped), wrapped_first))
     else:
         raise TypeError(
             "timeline_or_f must be either an instance of wt_frame.CLASS or a function."
         )
 
 
-def expand(timeline=None, num__bounds=2, **function_args) -> wt_frame.CLASS | Callable:
+def expand(
+    timeline=None,
+    num__bounds=2,
+    cycle_period=None,
+    digitizers=None,
+    tolerance=None,
+    is_held=False,
+    workers=None,
+    cache=None,
+    **function_args,
+) -> wt_frame.CLASS | Callable:
     """
     Converts the functions marked in the timeline into individual rows, i.e. applies the functions to the given data.
 
     This is generally a 'one-way' operation and so should only be carried out before the timeline is implemented on a device.
 
-    `num__bounds` refers to the number of points (and so rows) needed to define the ramp function in the first place. Currently, this is implicitly assumed to be two, i.e. that `ramp`s are simply defined by the origin, terminus and expansion function.
+    `num__bounds` refers to the number of points (and so rows) needed to define the ramp function in the first place, i.e. the knots of the ramp. By default, this is two, i.e. `ramp`s are simply defined by the origin, terminus and expansion function. Ramps with more knots (e.g. from `ramp`, given more than two [time, value] pairs for a variable) are piecewise: the function is applied between every pair of consecutive knots, for all of the pieces of all of the ramps at once, and the pieces are joined up (where a piece ends at the time that the next one starts, the sample of the next piece is kept). The number of knots of each ramp is taken from the 'num__bounds' column, where given, and `num__bounds` otherwise.
+
+    `cycle_period` samples the ramps directly on the grid of a device that works in cycles (e.g. ADwin), rather than sampling them in time and rounding to the nearest cycle afterwards (which makes samples collide). The ends of the ramps are rounded to the nearest cycle, the ramp functions are evaluated in units of cycles (with a `time_resolution` of a whole number of cycles: one by default) and every row is given an integer `cycle`. NOTE: As the ends of a ramp move by up to half a cycle, the whole ramp can be shifted by up to half a cycle with respect to sampling it in time, which changes the values at a given cycle on steep ramps (by up to 49 digits on an ADwin, in the demo experiment).
+
+    `digitizers` maps variables to functions that convert values to what the device actually outputs (e.g. DAC digits, see `adwin.core.digitizers`). As the device holds its output until the next sample, the samples of a ramp whose digitized value is the same as that of the sample before are dropped, i.e. only the points where the output changes are kept.
 
-    # NOTE: Not implemented for `num__bounds` != 2
+    `tolerance` (a number, or a dictionary of numbers by variable) compresses the ramps: only the points needed for the linear interpolation between them to stay within `tolerance` of the ramp are kept (see `ramp_function.knots`), such that smooth stretches of a ramp need few points and curved ones keep their density. Variables that aren't in the dictionary are kept whole. NOTE: A device that holds its output between points (e.g. ADwin) steps from point to point instead of interpolating and so can stray much further than `tolerance` from the ramp.
+
+    `is_held` compresses the ramps for such a device instead: a point is only dropped where its value is within `tolerance` of the last point kept (see `ramp_function.knots__held`), which keeps the held output within `tolerance` of the ramp.
+
+    `workers` (a number of threads or a `concurrent.futures.Executor`) spreads the ramps over threads, in chunks of roughly equal numbers of samples. NumPy releases the GIL in its heavy lifting, so this pays off for long sequences with many (dense) ramps. The chunks are put back together in order and so the result is the same as without `workers`. NOTE: Ramp functions without a native batched form (see `ramp_function.batched`) are called from several threads at once and so should be thread-safe.
+
+    `cache` (`True` for `ramp_function.EXPANSIONS`, or another `internal.cache.LRU`) keeps the samples of every ramp, keyed by its content, i.e. its endpoints, function and the arguments that the function accepts. Ramps that were already expanded (e.g. all but the one that was changed, in a scan) are then taken from the cache rather than being evaluated again. NOTE: The function is part of the key by identity, so `functools.partial`s that are made anew for every expansion are never found in the cache.
     """
     if timeline is None:
-        return wt_util.function__lambda(kwargs=["function_args"])
+        return wt_util.operation(expand, locals(), kwargs=["function_args"])
+
+    timeline = wt_frame.materialize(timeline)
 
     if "function" not in timeline.columns:
         # TODO: Add test for this 'feature'
+        if cycle_period is not None:
+            return timeline.assign(cycle=_cycles(timeline["time"], cycle_period))
         return timeline
 
     _mask_fs = timeline["function"].notna()
     _dff = timeline[_mask_fs].sort_values(by=["variable", "time"])
 
-    # Work out where the ramps start
-    _indices_drop = _dff.index
-    _inds__start = _dff.iloc[::num__bounds].index
-
-    # Mark the beginning and end points (allowing for the number of points per ramp specification to increase in the future)
-    _dff = _dff.reset_index(drop=True)
-    _dff["ramp_group"] = _dff.index // num__bounds
+    # Work out where the ramps start: runs of rows of the same variable (and number of knots) are split into ramps
+    _num = np.full(len(_dff), num__bounds, dtype=np.int64)
+    if "num__bounds" in _dff.columns:
+        _num = _dff["num__bounds"].fillna(num__bounds).to_numpy().astype(np.int64)
+    _is_run = np.ones(len(_dff), dtype=bool)
+    _is_run[1:] = (
+        _dff["variable"].to_numpy()[1:] != _dff["variable"].to_numpy()[:-1]
+    ) | (_num[1:] != _num[:-1])
+    _runs = np.flatnonzero(_is_run)
+    if (_num < 2).any() or (np.diff(np.append(_runs, len(_dff))) % _num[_runs]).any():
+        raise ValueError(
+            "Every ramp should be defined by {} points.".format(
+                ", ".join(map(str, np.unique(_num))) or num__bounds
+            )
+        )
+    _position = np.arange(len(_dff)) - np.repeat(
+        _runs, np.diff(np.append(_runs, len(_dff)))
+    )
+    _starts = np.flatnonzero(_position % _num == 0)
+    _inds__start = _dff.index[_starts]
+
+    _points = _dff[["time", "value"]].to_numpy()
+    _variables = _dff["variable"].to_numpy()[_starts]
+
+    # The pieces of the ramps, between consecutive knots
+    _pieces = _num[_starts] - 1
+    _knots = wt_util.ranges(_starts, _pieces)
+    _functions = _dff["function"].to_numpy()[np.repeat(_starts, _pieces)]
+
+    # Apply the ramp functions, in their batched form (see `wigner_time.ramp_function`), to all of the pieces that share a function at once
+    # - Only pass on the kwargs that the function accepts
+    _groups = {}
+    for k, f in enumerate(_functions):
+        _groups.setdefault(id(f), []).append(k)
+    if cycle_period is not None:
+        # The `time_resolution`, in whole cycles
+        _step = float(
+            max(
+                _cycles(
+                    function_args.get("time_resolution", cycle_period), cycle_period
+                ),
+                1,
+            )
+        )
+    if cache is True:
+        cache = wt_ramp_function.EXPANSIONS
+    _tasks, _cached, _keys = [], [], {}
+    for ramps in map(np.array, _groups.values()):
+        f = _functions[ramps[0]]
+        t1, t2 = _points[_knots[ramps], 0], _points[_knots[ramps] + 1, 0]
+        kws = function_args
+        if cycle_period is not None:
+            t1, t2 = _cycles(t1, cycle_period), _cycles(t2, cycle_period)
+            kws = kws | dict(time_resolution=_step)
+        v1, v2 = _points[_knots[ramps], 1], _points[_knots[ramps] + 1, 1]
+        kws = wt_util.kws__filtered(f, **kws)
+
+        keys = None if cache is None else _keys__cache(f, t1, v1, t2, v2, kws)
+        if keys is not None:
+            samples = [cache.get(key) for key in keys]
+            is_cached = np.array([s is not None for s in samples], dtype=bool)
+            if is_cached.any():
+                samples = [s for s in samples if s is not None]
+                _cached.append(
+                    (
+                        ramps[is_cached],
+                        *np.concatenate(samples, axis=1),
+                        np.array([s.shape[1] for s in samples]),
+                    )
+                )
+            _keys.update((r, k) for r, k, c in zip(ramps, keys, is_cached) if not c)
+            ramps, t1, v1, t2, v2 = (a[~is_cached] for a in (ramps, t1, v1, t2, v2))
+            if not len(ramps):
+                continue
+        _tasks.append((ramps, f, t1, v1, t2, v2, kws))
+    if workers is not None:
+        _tasks = _chunks(_tasks, workers)
+
+    def _evaluate(task):
+        ramps, f, t1, v1, t2, v2, kws = task
+        times, values, offsets = wt_ramp_function.batched(f)(t1, v1, t2, v2, **kws)
+        return ramps, times, values, np.diff(offsets)
+
+    if (workers is None) or (len(_tasks) < 2):
+        _results = list(map(_evaluate, _tasks))
+    elif isinstance(workers, concurrent.futures.Executor):
+        _results = list(workers.map(_evaluate, _tasks))
+    else:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            _results = list(executor.map(_evaluate, _tasks))
+    for ramps, times, values, sizes in _results if _keys else []:
+        offsets = np.cumsum(sizes) - sizes
+        for r, o, n in zip(ramps, offsets, sizes):
+            samples = np.stack([times[o : o + n], values[o : o + n]])
+            samples.setflags(write=False)
+            cache.put(_keys[r], samples)
+    _results += _cached
+    _ramps, _times, _values, _sizes = ([r[i] for r in _results] for i in range(4))
+
+    # Put the points back in the order of the ramps
+    _order = np.argsort(np.concatenate(_ramps + [[]]).astype(np.int64))
+    _sizes__batched = np.concatenate(_sizes + [[]]).astype(np.int64)
+    _sizes = _sizes__batched[_order]
+    _positions = wt_util.ranges(
+        (np.cumsum(_sizes__batched) - _sizes__batched)[_order], _sizes
+    )
 
-    # Fill out the values
-    _dfs = []
+    _times = np.concatenate(_times + [[]])[_positions].astype(float)
+    _values = np.concatenate(_values + [[]])[_positions].astype(float)
+    if (_pieces > 1).any():
+        _times, _values, _sizes = _join(_times, _values, _sizes, _pieces)
+    if tolerance is not None:
+        _keep = (wt_ramp_function.knots__held if is_held else wt_ramp_function.knots)(
+            _times,
+            _values,
+            np.concatenate([[0], np.cumsum(_sizes)]),
+            (
+                [tolerance.get(v, np.nan) for v in _variables]
+                if isinstance(tolerance, dict)
+                else tolerance
+            ),
+        )
+        _times, _values, _sizes = _filter(_times, _values, _sizes, _keep)
+    if digitizers:
+        _keep = _is_output__changed(_values, _variables, _sizes, digitizers)
+        _times, _values, _sizes = _filter(_times, _values, _sizes, _keep)
+
+    _columns = {}
+    _timeline = timeline.drop(
+        index=_dff.index, columns=["function", "num__bounds"], errors="ignore"
+    )
+    if cycle_period is not None:
+        _columns["cycle"] = _cycles(_times, 1)
+        _times = _columns["cycle"] * cycle_period
+        _timeline = _timeline.assign(cycle=_cycles(_timeline["time"], cycle_period))
 
     # For adding back in the value of other columns, based on the first row, like `context` etc. Written this way to allow for more, unknown columns to continue.
     _columns__keep = _dff.columns.drop(
-        ["time", "value", "variable", "function", "ramp_group"]
+        ["time", "value", "variable", "function", "num__bounds", *_columns],
+        errors="ignore",
+    )
+    _dff__start = _dff.iloc[_starts]
+
+    _rows = wt_frame.new(
+        {
+            "time": _times,
+            "variable": np.repeat(_variables, _sizes),
+            "value": _values,
+            **{c: np.repeat(_dff__start[c].to_numpy(), _sizes) for c in _columns__keep},
+            **_columns,
+        },
+        columns=["time", "variable", "value", *_columns__keep, *_columns],
     )
 
-    for _, _group in _dff.groupby("ramp_group"):
-        _pt_start, _pt_end = _group[["time", "value"]].values
+    # Add the values back into the main timeline (with the ramp definitions removed)
+    return wt_frame.insert_rows(_timeline, _inds__start, _rows, _sizes)
 
-        # Apply the ramp function
-        # - Only pass on the kwargs that the function accepts
-        func = wt_util.function__filtered_kws(
-            _group["function"].tolist()[0], **function_args
-        )
 
-        _dfs.append(
-            create(
-                [
-                    _group["variable"].tolist()[0],
-                    func(_pt_start, _pt_end),
-                ],
-            ).assign(**_group.iloc[0][_columns__keep].to_dict())
+def _join(times, values, sizes, pieces):
+    """
+    Joins up the (concatenated) samples of the pieces of the ramps (of the given `sizes`), where every ramp is made up of the given number of `pieces` (see `expand`). Where a piece ends at the time that the next one (of the same ramp) starts, its last sample is dropped.
+    """
+    ramp = np.repeat(np.arange(len(pieces)), pieces)
+    ends = np.cumsum(sizes)
+    is_joined = (ramp[1:] == ramp[:-1]) & (sizes[:-1] > 0) & (sizes[1:] > 0)
+    last, first = ends[:-1][is_joined] - 1, ends[:-1][is_joined]
+    keep = np.ones(len(times), dtype=bool)
+    keep[last[times[last] == times[first]]] = False
+
+    times, values, sizes = _filter(times, values, sizes, keep)
+    return (
+        times,
+        values,
+        np.bincount(ramp, weights=sizes, minlength=len(pieces)).astype(np.int64),
+    )
+
+
+def _keys__cache(f, t1, v1, t2, v2, kws):
+    """
+    The keys of the ramps (that share the function `f`) in the cache of `expand`, or `None` where the arguments can't be part of a key.
+    """
+    kws = tuple(sorted(kws.items()))
+    try:
+        hash((f, kws))
+    except TypeError:
+        return None
+    return [
+        (f, kws, *endpoints)
+        for endpoints in zip(t1.tolist(), v1.tolist(), t2.tolist(), v2.tolist())
+    ]
+
+
+def _chunks(tasks, workers):
+    """
+    Splits the tasks of `expand` (the ramps that share a function) into chunks of consecutive ramps, with roughly the same (estimated) number of samples in each, such that every worker gets about the same amount of work.
+    """
+    num = (
+        workers
+        if isinstance(workers, int)
+        else getattr(workers, "_max_workers", None) or os.cpu_count() or 1
+    )
+
+    # The number of samples goes with the duration of the ramp
+    weights = [np.abs(t2 - t1) + np.finfo(float).eps for _, _, t1, _, t2, _, _ in tasks]
+    weight__chunk = sum(w.sum() for w in weights) / num
+
+    chunks = []
+    for (ramps, f, t1, v1, t2, v2, kws), w in zip(tasks, weights):
+        bounds = np.searchsorted(
+            np.cumsum(w),
+            weight__chunk * np.arange(1, int(np.ceil(w.sum() / weight__chunk))),
         )
+        for s in np.split(np.arange(len(ramps)), np.unique(bounds)):
+            if len(s):
+                chunks.append((ramps[s], f, t1[s], v1[s], t2[s], v2[s], kws))
+    return chunks
 
-    timeline.drop(index=_indices_drop, inplace=True)
-    timeline.drop(columns=["function"], inplace=True)
 
-    # Add the values back into the main timeline
-    return wt_frame.insert_dataframes(timeline, _inds__start, _dfs)
+def _filter(times, values, sizes, keep):
+    """
+    Only `keep`s some of the (concatenated) samples of the ramps of the given `sizes`.
+    """
+    return (
+        times[keep],
+        values[keep],
+        np.bincount(
+            np.repeat(np.arange(len(sizes)), sizes)[keep], minlength=len(sizes)
+        ),
+    )
+
+
+def _is_output__changed(values, variables, sizes, digitizers):
+    """
+    Whether each of the (concatenated) samples of the ramps (of the given `variables` and `sizes`) changes the output of the device, according to `digitizers` (see `expand`). The first sample of every ramp is always kept, as are the samples of variables without a digitizer.
+    """
+    ramp = np.repeat(np.arange(len(sizes)), sizes)
+    digits = np.full(len(values), np.nan)
+    for variable, digitize in digitizers.items():
+        mask = np.repeat(variables == variable, sizes)
+        if mask.any():
+            digits[mask] = digitize(values[mask])
+
+    is_changed = np.ones(len(values), dtype=bool)
+    is_changed[1:] = (digits[1:] != digits[:-1]) | (ramp[1:] != ramp[:-1])
+    return is_changed
+
+
+def _cycles(times, cycle_period):
+    """
+    The number of the nearest cycle, for the given time(s).
+    """
+    return np.round(np.asarray(times, dtype=float) / cycle_period).astype(np.int64)
 
 
 def is_value_within_range(value, unit_range):
@@ -492,14 +876,12 @@ def sanitize_values(timeline):
     # TODO: Check for efficiency
     #
     if ("unit_range" in timeline.columns) or ("safety_range" in timeline.columns):
-        df = deepcopy(timeline)
-
         # List to store rows with values outside the range
         rows__out_of_unit_range = []
         rows__out_of_safety_range = []
 
         # Iterate through each row
-        for index, row in df.iterrows():
+        for index, row in timeline.iterrows():
             if not is_value_within_range(row["value"], row["unit_range"]):
                 print(
                     f"Value {row['value']} is outside device unit range {row['unit_range']} for {row['variable']} at time {row['time']} at dataframe index {index}."
@@ -535,7 +917,7 @@ def sanitize__round_value(timeline, num_decimal_places=6):
     """
     Rounds the 'value' column to the given number of decimal places and returns the updated timeline.
     """
-    df = deepcopy(timeline)
+    df = wt_frame.copy(timeline)
     df["value"] = df["value"].round(num_decimal_places)
     return df
 
@@ -2,6 +2,7 @@
 
 from collections.abc import Iterable, Sequence
 from typing import Callable, OrderedDict
+import functools
 import inspect
 
 import numpy as np
@@ -113,14 +114,25 @@ def range__inclusive(start, stop, step):
     return np.linspace(start, stop, num=num)
 
 
-def function__filtered_kws(f: Callable, **kws) -> Callable:
+def ranges(starts, sizes):
     """
-    Converts the given function into a function lambda, where `kws` is used to update relevant arguments and other supplied kws are ignored.
+    The concatenation of `np.arange(start, start + size)` for every pair of `starts` and `sizes`, without a python loop.
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    sizes = np.asarray(sizes, dtype=np.int64)
+    return np.repeat(starts - (np.cumsum(sizes) - sizes), sizes) + np.arange(
+        sizes.sum()
+    )
+
+
+def kws__filtered(f: Callable, **kws) -> dict:
+    """
+    The subset of `kws` that `f` accepts (all of them, if `f` accepts arbitrary keyword arguments).
     """
     sig = inspect.signature(f)
     is_acceptable_kwargs = any(p.kind == p.VAR_KEYWORD for p in sig.parameters.values())
     if is_acceptable_kwargs:
-        return lambda *args: f(*args, **kws)
+        return kws
     else:
         # Filter only allowed kwargs
         accepted_keys = {
@@ -128,8 +140,15 @@ def function__filtered_kws(f: Callable, **kws) -> Callable:
             for k, p in sig.parameters.items()
             if p.kind in (p.KEYWORD_ONLY, p.POSITIONAL_OR_KEYWORD)
         }
-        filtered_kwargs = {k: v for k, v in kws.items() if k in accepted_keys}
-        return lambda *args: f(*args, **filtered_kwargs)
+        return {k: v for k, v in kws.items() if k in accepted_keys}
+
+
+def function__filtered_kws(f: Callable, **kws) -> Callable:
+    """
+    Converts the given function into a function lambda, where `kws` is used to update relevant arguments and other supplied kws are ignored.
+    """
+    filtered_kwargs = kws__filtered(f, **kws)
+    return lambda *args: f(*args, **filtered_kwargs)
 
 
 def flatten_keys(d: OrderedDict, ks: str) -> OrderedDict:
@@ -181,32 +200,108 @@ def args_in_function(f: Callable, kwargs, exclude=(), call_frame=None) -> Ordere
     return args
 
 
+@functools.cache
+def _signature(f: Callable):
+    """
+    The names of the parameters of `f`, in order. Cached, as `inspect.signature` is comparatively slow.
+    """
+    return tuple(inspect.signature(f).parameters)
+
+
+def _freeze(v):
+    """
+    A hashable equivalent of `v`, for comparing the arguments of `Operation`s.
+    """
+    if isinstance(v, dict):
+        return ("dict", tuple((k, _freeze(x)) for k, x in v.items()))
+    if isinstance(v, (list, tuple)):
+        return (type(v).__name__, tuple(_freeze(x) for x in v))
+    if isinstance(v, np.ndarray):
+        return ("ndarray", v.dtype.str, v.shape, v.tobytes())
+    try:
+        hash(v)
+    except TypeError:
+        # Objects without a value-based identity compare by identity
+        return ("id", id(v))
+    return v
+
+
+class Operation:
+    """
+    A timeline function together with its (bound) arguments, waiting for the timeline, e.g. the result of `update(AOM_MOT=1)` before it is `stack`ed.
+
+    Calling the operation on a timeline `x` runs `func(timeline=x, **kwargs)`, where additional keyword arguments take precedence.
+
+    Operations are cheap to create, hashable (e.g. as keys for memoization), comparable by value and picklable (e.g. for process pools), as long as their arguments are.
+    """
+
+    __slots__ = ("func", "kwargs", "lambda_key", "_key")
+
+    def __init__(self, func: Callable, kwargs: dict, lambda_key="timeline"):
+        self.func = func
+        self.kwargs = kwargs
+        self.lambda_key = lambda_key
+        self._key = None
+
+    def __call__(self, x, **kwargs__new):
+        return self.func(**{self.lambda_key: x, **self.kwargs, **kwargs__new})
+
+    def key(self):
+        if self._key is None:
+            self._key = (self.func, self.lambda_key, _freeze(self.kwargs))
+        return self._key
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __eq__(self, other):
+        if not isinstance(other, Operation):
+            return NotImplemented
+        return self.key() == other.key()
+
+    def __reduce__(self):
+        return (Operation, (self.func, dict(self.kwargs), self.lambda_key))
+
+    def __repr__(self):
+        return "{}({})".format(
+            self.func.__name__,
+            ", ".join("{}={!r}".format(k, v) for k, v in self.kwargs.items()),
+        )
+
+
+def operation(
+    f: Callable, arguments: dict, lambda_key="timeline", kwargs=["vtvc_dict"]
+) -> Operation:
+    """
+    The `Operation` corresponding to calling `f` with the given `arguments` (normally `locals()`, at the start of `f`), where the `lambda_key` argument is left open for the timeline.
+
+    The dictionaries of variable keyword arguments (named in `kwargs`) are flattened into the other arguments.
+    """
+    bound = {}
+    for name in _signature(f):
+        if name == lambda_key:
+            continue
+        if name in kwargs:
+            bound.update(arguments[name])
+        else:
+            bound[name] = arguments[name]
+    return Operation(f, bound, lambda_key=lambda_key)
+
+
 def function__lambda(lambda_key="timeline", kwargs=["vtvc_dict"]):
     """
-    Returns a function lamba based on the given function, and current local values, where the existing kwargs can be overwritten.
+    Returns a function lamba (as an `Operation`) based on the given function, and current local values, where the existing kwargs can be overwritten.
 
     The `lambda_key` determines which variable becomes the primary argument in the lambda.
 
-    NOTE: strongly dependent on the environment in which it is called.
+    NOTE: strongly dependent on the environment in which it is called. Prefer `operation`.
     """
 
     frame = inspect.currentframe().f_back
     name__f = frame.f_code.co_name
     f = frame.f_globals[name__f]
 
-    kwargs = args_in_function(f, kwargs=kwargs, call_frame=frame)
-
-    lambda_pair = [lambda_key, kwargs.pop(lambda_key)]
-
-    if lambda_pair is not None:
-        k, v = lambda_pair
-    else:
+    if lambda_key not in frame.f_locals:
         raise ValueError("Function `f` needs to have arguments in `function__lambda`.")
 
-    return lambda x, **kwargs__new: f(
-        **{
-            k: x,
-            **kwargs,
-            **kwargs__new,
-        }
-    )
+    return operation(f, frame.f_locals, lambda_key=lambda_key, kwargs=kwargs)